@@ -0,0 +1,381 @@
+#!/usr/bin/env python3.9
+# -*- coding: utf-8 -*-
+
+# Benchmark module
+# Copyright (C) 2021 Yoshman <yoshman2020@gmail.com>
+# Copyright (C) 2014 Musikhin Andrey <melomansegfault@gmail.com>
+
+"""
+Benchmarks of the table hot paths, without a display.
+
+Each case builds a table with some rows and columns, in widget or virtual
+mode, and times add_rows, add_row, sort_list, choose_row, the column width
+drag (_on_change_label_width), ScrollViewTable up/down/pgdn, del_row,
+del_row_all and a scripted scroll through the table (frame time
+percentiles). Peak RSS, widget and canvas instruction counts are recorded
+with the results, saved as JSON:
+
+    python benchmark.py --sizes 1000 10000 100000 --cols 2 5 -o new.json
+    python benchmark.py --compare old.json new.json
+
+Kivy runs with the mock GL backend and the SDL offscreen video driver,
+unless KIVY_GL_BACKEND/SDL_VIDEODRIVER/KIVY_WINDOW are set. Where the
+window still can't be opened, run it under xvfb-run. Each case runs in its
+own process by default, so that the peak RSS is the one of the case.
+Widget mode cases with more cells than --max-cells are skipped, they're
+listed as skipped in the output and in the comparison.
+"""
+
+import os
+
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+# the dummy driver has no GL, Kivy would then fall back to X11
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+os.environ.setdefault('KIVY_WINDOW', 'sdl2')
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+
+import argparse
+import gc
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import traceback
+
+# rows added, chosen, moved to or deleted one by one in each case
+STEP_COUNT = 100
+# frames of the scripted scroll
+SCROLL_FRAMES = 200
+
+
+def _percentile(values, fraction):
+    """ Value at a fraction (0..1) of the sorted values """
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def _rss_kb():
+    """ Current resident set size in KB """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return None
+
+
+def _peak_rss_kb():
+    """ Peak resident set size of the process in KB """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _count_instructions(group):
+    """ Canvas instructions in a canvas, with the nested groups """
+    count = 0
+    for child in group.children:
+        count += 1
+        if getattr(child, 'children', None) is not None:
+            count += _count_instructions(child)
+    return count
+
+
+class TableBench(object):
+    """ One benchmark case, a table of rows x cols in a mode """
+
+    def __init__(self, rows, cols, virtual):
+        self.rows = rows
+        self.cols = cols
+        self.virtual = virtual
+        self.results = {}
+
+    def frame(self):
+        """ Run one frame of the event loop, returns its time """
+        from kivy.base import EventLoop
+        start = time.perf_counter()
+        EventLoop.idle()
+        return time.perf_counter() - start
+
+    def frames(self, count=3):
+        for _ in range(count):
+            self.frame()
+
+    def timed(self, name, function, count=1):
+        """ Time function and the frame after it """
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        self.frame()
+        seconds = time.perf_counter() - start
+        self.results[name] = {'seconds': seconds,
+                              'per_op': seconds / count, 'count': count}
+        return seconds
+
+    def counts(self, name):
+        """ Record the widgets, canvas instructions and memory """
+        self.results[name] = {
+            'widgets': sum(1 for _ in self.table.walk(restrict=True)),
+            'instructions': _count_instructions(self.table.canvas),
+            'rss_kb': _rss_kb(),
+            'peak_rss_kb': _peak_rss_kb(),
+        }
+
+    def row_items(self, num):
+        """ Cells of a row, a text column and float columns """
+        from kivy.uix.button import Button
+        items = [[Button, {'text': 'row %d' % num}]]
+        for col in range(1, self.cols):
+            items.append([Button, {'text': '%.3f' % random.uniform(0, 1e6),
+                                   'sort_key': float}])
+        return items
+
+    def setup(self):
+        from kivy.base import EventLoop
+        from kivy.core.window import Window
+        from table import Table
+        EventLoop.ensure_window()
+        Window.size = (1000, 700)
+        self.table = Table()
+        Window.add_widget(self.table)
+        self.frames()
+        self.table.virtual = self.virtual
+        self.table.cols = self.cols
+        self.frames()
+
+    def teardown(self):
+        from kivy.core.window import Window
+        Window.remove_widget(self.table)
+        self.table = None
+        self.frames()
+        gc.collect()
+
+    def run(self):
+        random.seed(0)
+        self.setup()
+        table = self.table
+        view = table.scroll_view
+        self.counts('empty')
+        self.timed('add_rows', lambda: table.add_rows(
+            self.row_items(num) for num in range(self.rows)), self.rows)
+        self.frames()
+        self.counts('loaded')
+
+        def add_row():
+            for num in range(STEP_COUNT):
+                table.add_row(*self.row_items(self.rows + num))
+        self.timed('add_row', add_row, STEP_COUNT)
+
+        self.timed('sort_list', lambda: table.sort_list(1 % self.cols,
+                                                        False))
+        self.timed('sort_list_rev', lambda: table.sort_list(1 % self.cols,
+                                                            True))
+        self.timed('sort_list_multi', lambda: table.sort_list(0, False,
+                                                              True))
+
+        def choose_row():
+            for _ in range(STEP_COUNT):
+                table.choose_row(random.randrange(table.row_count))
+        self.timed('choose_row', choose_row, STEP_COUNT)
+
+        splitter = table.label_panel.labels[1].parent
+
+        def drag_width():
+            for _ in range(20):
+                splitter.width += 5
+                self.frame()
+        self.timed('label_width_drag', drag_width, 20)
+
+        def settle_width():
+            grid = table.grid
+            grid._trigger_all_widths.cancel()
+            grid._apply_all_widths()
+        self.timed('label_width_settle', settle_width)
+
+        table.choose_row(0)
+        view.scroll_y = 1
+        self.frames()
+
+        def move(method, count):
+            def steps():
+                for _ in range(count):
+                    method()
+                    self.frame()
+            return steps
+        self.timed('down', move(view.down, STEP_COUNT), STEP_COUNT)
+        self.timed('pgdn', move(view.pgdn, STEP_COUNT // 10),
+                   STEP_COUNT // 10)
+        self.timed('up', move(view.up, STEP_COUNT), STEP_COUNT)
+
+        self.scroll()
+
+        def del_row():
+            for _ in range(STEP_COUNT):
+                table.del_row(table.row_count // 2)
+        self.timed('del_row', del_row, STEP_COUNT)
+        self.timed('del_row_all', table.del_row_all, table.row_count)
+        self.counts('cleared')
+        self.teardown()
+        return self.results
+
+    def scroll(self):
+        """ Scroll from the top to the bottom, the time of each frame """
+        view = self.table.scroll_view
+        view.scroll_y = 1
+        self.frames()
+        times = []
+        for step in range(SCROLL_FRAMES + 1):
+            view.scroll_y = 1 - step / float(SCROLL_FRAMES)
+            times.append(self.frame())
+        self.results['scroll'] = {
+            'frames': len(times),
+            'seconds': sum(times),
+            'p50': _percentile(times, .5),
+            'p90': _percentile(times, .9),
+            'p99': _percentile(times, .99),
+            'max': max(times),
+        }
+
+
+def configure_kivy():
+    """ Frames without the frame rate limit, before the clock is created """
+    from kivy.config import Config
+    Config.set('graphics', 'maxfps', '0')
+
+
+def run_case(rows, cols, virtual):
+    """ Results of a case, as the entry of the JSON results """
+    configure_kivy()
+    return {'rows': rows, 'cols': cols, 'virtual': virtual,
+            'results': TableBench(rows, cols, virtual).run()}
+
+
+def run_isolated(rows, cols, virtual):
+    """ Run a case in a new process, for its own peak RSS """
+    command = [sys.executable, os.path.abspath(__file__), '--case',
+               str(rows), str(cols), '1' if virtual else '0']
+    output = subprocess.run(command, stdout=subprocess.PIPE, check=True,
+                            universal_newlines=True).stdout
+    # the JSON is the last line, Kivy may print before it
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def metadata():
+    """ Environment of the run """
+    info = {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'gl_backend': os.environ.get('KIVY_GL_BACKEND')}
+    try:
+        import kivy
+        info['kivy'] = kivy.__version__
+    except ImportError:
+        info['kivy'] = None
+    try:
+        import numpy
+        info['numpy'] = numpy.__version__
+    except ImportError:
+        info['numpy'] = None
+    try:
+        info['commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True).stdout.strip() or None
+    except OSError:
+        info['commit'] = None
+    return info
+
+
+def _case_key(case):
+    return (case['rows'], case['cols'], case['virtual'])
+
+
+def compare(old_path, new_path):
+    """ Print the time ratios new/old of the cases in both files """
+    with open(old_path) as old_file:
+        old = dict((_case_key(case), case) for case in
+                   json.load(old_file)['cases'])
+    with open(new_path) as new_file:
+        new = json.load(new_file)['cases']
+    for case in new:
+        old_case = old.get(_case_key(case))
+        if old_case is None:
+            continue
+        print('%d rows x %d cols%s' % (case['rows'], case['cols'],
+                                       ' virtual' if case['virtual'] else ''))
+        if 'results' not in old_case or 'results' not in case:
+            skipped_in = [path for path, side in ((old_path, old_case),
+                                                  (new_path, case))
+                          if 'results' not in side]
+            print('  skipped (over --max-cells) in %s' %
+                  ' and '.join(skipped_in))
+            continue
+        for name, result in sorted(case['results'].items()):
+            old_result = old_case['results'].get(name, {})
+            for field in ('seconds', 'p99', 'peak_rss_kb'):
+                if result.get(field) and old_result.get(field):
+                    print('  %-20s %-12s %10.4g -> %10.4g  x%.2f' % (
+                        name, field, old_result[field], result[field],
+                        result[field] / float(old_result[field])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--cols', type=int, nargs='+', default=[2, 5])
+    parser.add_argument('--modes', nargs='+', default=['widget', 'virtual'],
+                        choices=['widget', 'virtual'])
+    parser.add_argument('--max-cells', type=int, default=100000,
+                        help='skip widget mode cases with more cells')
+    parser.add_argument('--no-isolate', action='store_true',
+                        help='run all the cases in this process')
+    parser.add_argument('-o', '--output', default='benchmark.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--case', nargs=3, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.case:
+        rows, cols, virtual = args.case
+        print(json.dumps(run_case(rows, cols, bool(virtual))))
+        return
+
+    cases = []
+    for mode in args.modes:
+        virtual = mode == 'virtual'
+        for cols in args.cols:
+            for rows in args.sizes:
+                if not virtual and rows * cols > args.max_cells:
+                    print('%d rows x %d cols %s skipped (over --max-cells)' %
+                          (rows, cols, mode), file=sys.stderr)
+                    cases.append({'rows': rows, 'cols': cols,
+                                  'virtual': virtual, 'skipped': True})
+                    continue
+                print('%d rows x %d cols %s' % (rows, cols, mode),
+                      file=sys.stderr)
+                if args.no_isolate:
+                    cases.append(run_case(rows, cols, virtual))
+                else:
+                    cases.append(run_isolated(rows, cols, virtual))
+    with open(args.output, 'w') as output:
+        json.dump({'meta': metadata(), 'cases': cases}, output, indent=1)
+    print('saved to %s' % args.output, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception:
+        # Kivy replaces sys.stderr, without a console log it's not shown
+        traceback.print_exc(file=sys.__stderr__)
+        sys.exit(1)
@@ -8,34 +8,157 @@
 # import kivy
 from kivy.clock import Clock
 from kivy.core.window import Window
-from kivy.core.window.window_sdl2 import WindowSDL
+from kivy.core.text import Label as CoreLabel, DEFAULT_FONT
+from kivy.metrics import sp
 from kivy.lang import Builder
-from kivy.graphics import Color, Rectangle
+from kivy.graphics import Color, Rectangle, BorderImage, InstructionGroup
 from kivy.uix.behaviors import FocusBehavior
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.splitter import Splitter
 from kivy.uix.button import Button, ButtonBehavior
+from kivy.uix.widget import WidgetException
 from kivy.graphics import Line
-from os.path import join, dirname, abspath
+from os.path import join, dirname, abspath, getsize, splitext
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
+from functools import lru_cache, wraps
+from itertools import chain, islice, repeat
+import asyncio
+import csv
 import math
+import queue
+import sqlite3
+import threading
+import time
 import unicodedata
 
+try:
+    # optional, speeds up sorting and filtering of float/int columns
+    import numpy
+except ImportError:
+    numpy = None
+
 
 Builder.load_file(join(dirname(abspath(__file__)), 'table.kv'))
 
 
+class TableStats(object):
+    """
+    Counters and timing histograms of the table operations, collected
+    after Table.enable_stats. hook(name, seconds) is called after each
+    operation, e.g. to forward it to a metrics pipeline.
+    """
+
+    # upper bounds of the histogram buckets in seconds, the last is open
+    buckets = (.0001, .0005, .001, .002, .005, .01, .016, .033, .05, .1,
+               .25, .5, 1., float('inf'))
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        # name: [count, total seconds, max seconds, bucket counts]
+        self._ops = {}
+
+    def record(self, name, seconds):
+        """ Count an operation that took seconds """
+        op = self._ops.get(name)
+        if op is None:
+            op = self._ops[name] = [0, 0., 0., [0] * len(self.buckets)]
+        op[0] += 1
+        op[1] += seconds
+        if seconds > op[2]:
+            op[2] = seconds
+        op[3][bisect_left(self.buckets, seconds)] += 1
+        if self.hook is not None:
+            self.hook(name, seconds)
+
+    def reset(self):
+        """ Forget the recorded operations """
+        self._ops.clear()
+
+    def snapshot(self):
+        """
+        Recorded operations as a dict, name: {'count', 'total', 'mean',
+        'max', 'histogram'}, the histogram is a list of
+        (bucket upper bound in seconds, count).
+        """
+        return dict((name, {'count': count, 'total': total,
+                            'mean': total / count, 'max': longest,
+                            'histogram': list(zip(self.buckets, counts))})
+                    for name, (count, total, longest, counts)
+                    in self._ops.items())
+
+
+def _timed(name):
+    """
+    Record the calls of a method of Table, GridTable or ScrollViewTable
+    as the operation name, while their _stats is set
+    """
+    def decorator(method):
+        @ wraps(method)
+        def wrapper(self, *args, **kwargs):
+            stats = self._stats
+            if stats is None:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                stats.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
 class Table(FocusBehavior, BoxLayout):
     """My table widget"""
 
     default_col_width = 300
+    default_row_height = 30
+    # seconds between keys of one type-ahead search
+    search_timeout = 1.0
+    # rows loaded at once from a row source
+    default_page_size = 100
+    # pages of a row source loaded at most in a frame or a key press, when
+    # a filter hides the loaded rows
+    max_fetch_pages = 10
+    # space around the texts of an 'auto' width column
+    auto_width_padding = 20
+    # core labels measuring the texts, (font name, font size): CoreLabel
+    _measure_labels = {}
+    # TableStats while the operations are recorded
+    _stats = None
 
     def __init__(self, **kwargs):
         super(Table, self).__init__(**kwargs)
         self._cols = 2
         self._cols_width = []
         self._chosen_row = 0
+        # Row where a shift-click range selection starts
+        self._anchor_row = 0
+        # Current sort, list of (col, rev), the first key sorts first
+        self._sort_keys = []
+        # Type-ahead search
+        self._search_col = None
+        self._search_text = ''
+        self._search_time = 0
+        self._grid = None
+        self._model = TableModel()
+        self._virtual = False
+        self._trigger_viewport = Clock.create_trigger(self._update_viewport)
+        # Row source, loaded in pages when the view nears the loaded end
+        self._source = None
+        self._source_total = None
+        self._source_loaded = 0
+        self._source_done = True
+        self._page_size = self.default_page_size
+        self._trigger_fetch = Clock.create_trigger(self._check_fetch)
+        # CSV loading, the chunks parsed by the worker thread
+        self._csv_chunks = None
+        self._csv_stop = None
+        self._csv_rows = 0
+        self._csv_callbacks = (None, None)
         Clock.schedule_once(self.init_ui, 0)
         self._keyboard = Window.request_keyboard(self._keyboard_closed, self)
         self._keyboard.bind(on_key_down=self._on_keyboard_down)
@@ -45,10 +168,28 @@ class Table(FocusBehavior, BoxLayout):
         self._label_panel = self.children[1].children[0]
         # Getting the GridTable object for working with it
         self._grid = self.children[0].children[0].children[0]
+        self._grid._model = self._model
+        self._grid._virtual = self._virtual
         # Getting the NumberPanel object for working with it
         self._number_panel = self.children[0].children[0].children[1]
         # Getting the ScrollViewTable object for working with it
         self._scroll_view = self.children[0]
+        # Rebind pooled widgets when the view moves (virtual mode)
+        self._scroll_view.fbind('scroll_y', self._trigger_viewport)
+        self._scroll_view.fbind('height', self._trigger_viewport)
+        # Load pages of the row source when scrolling near the end
+        self._scroll_view.fbind('scroll_y', self._trigger_fetch)
+        self._scroll_view.fbind('height', self._trigger_fetch)
+        self._grid.fbind('height', self._trigger_fetch)
+        # Resize the cells coming into view after a column resize
+        self._scroll_view.fbind('scroll_y', self._grid._trigger_col_widths)
+        # Paint the selection of the rows coming into view, also when the
+        # rows move after the layout (deleting, filtering)
+        self._scroll_view.fbind('scroll_y', self._grid._trigger_paint)
+        self._scroll_view.fbind('height', self._grid._trigger_paint)
+        self._grid.parent.fbind('height', self._grid._trigger_paint)
+        self._grid._stats = self._stats
+        self._scroll_view._stats = self._stats
 
     @ property
     def scroll_view(self):
@@ -59,6 +200,11 @@ class Table(FocusBehavior, BoxLayout):
         """ Grid object """
         return self._grid
 
+    @ property
+    def model(self):
+        """ Columnar data model of the table """
+        return self._model
+
     @ property
     def label_panel(self):
         """ Label panel object """
@@ -106,15 +252,37 @@ class Table(FocusBehavior, BoxLayout):
         self._cols_width = cols_width
         self.set_col_width()
 
+    @ property
+    def virtual(self):
+        """
+        Get/set virtualized rendering. Rows are kept as plain data and only
+        the rows in view get (recycled) widgets. Set it before adding rows.
+        """
+        return self._virtual
+
+    @ virtual.setter
+    def virtual(self, value):
+        if self._model.row_count:
+            print('ERROR: Please, set virtual before adding rows')
+            return
+        self._virtual = value
+        if self._grid:
+            self._grid._virtual = value
+
+    @ property
+    def row_height(self):
+        """ Row height in virtual mode """
+        return self.default_row_height
+
     @ property
     def row_count(self):
-        """ Get row count in our table """
-        grid_item_count = len(self.grid.children)
-        count = math.floor(grid_item_count / self._cols)
-        remainder = grid_item_count % self._cols
-        if remainder > 0:
-            count += 1
-        return count
+        """ Get row count in our table, without rows hidden by the filter """
+        return len(self._model.shown_rows)
+
+    @ property
+    def sort_keys(self):
+        """ Current sort as a list of (col, rev) """
+        return self._sort_keys
 
     @ property
     def chosen_row(self):
@@ -125,54 +293,80 @@ class Table(FocusBehavior, BoxLayout):
     def chosen_row(self, value):
         self._chosen_row = value
 
+    @ property
+    def stats(self):
+        """ TableStats of the recorded operations, None if disabled """
+        return self._stats
+
+    def enable_stats(self, hook=None):
+        """
+        Record the counts and times of the row insertions, deletions,
+        sorts, selections, column width changes, redraws and keyboard
+        moves of this table. hook(name, seconds) is called after each one.
+        Disabled, the operations only check that _stats is None.
+        Example: enable_stats(); ...; print(table.stats.snapshot())
+        """
+        self._stats = TableStats(hook)
+        self._share_stats()
+
+    def disable_stats(self):
+        """ Stop recording the operations """
+        self._stats = None
+        self._share_stats()
+
+    def _share_stats(self):
+        """ Let the grid and the scroll view record to the same stats """
+        if self._grid:
+            self._grid._stats = self._stats
+            self._scroll_view._stats = self._stats
+
+    @ property
+    def selected_count(self):
+        """ Number of selected rows """
+        return self._model.selection.count()
+
+    def selected_ranges(self):
+        """
+        Iterator of (start, stop) of the selected rows, row numbers
+        start..stop-1 ascending, without listing the rows.
+        Example: for start, stop in selected_ranges(): ...
+        """
+        return self._model.selection.ranges()
+
+    def is_selected(self, row_num):
+        """ Whether a row is selected """
+        return row_num in self._model.selection
+
     def add_button_row(self, *args):
         """
         Add new row to table with Button widgets.
         Example: add_button_row('123', 'asd', '()_+')
         """
         if len(args) == self._cols:
-            row_widget_list = []
-            for num, item in enumerate(args):
-                Cell = type('Cell', (NewCell, Button), {})
-                cell = Cell()
-                cell.text = item
-                self.grid.add_widget(cell)
-                # Create widgets row list
-                row_widget_list.append(self.grid.children[0])
-            # Adding a widget to two-level array
-            self._grid._cells.append(row_widget_list)
-            self.number_panel.add_widget(NewNumberLabel(
-                text=str(self.row_count)))
+            self.add_row(*[[Button, {'text': item}] for item in args])
         else:
             print('ERROR: Please, add %s strings in method\'s arguments' %
                   str(self._cols))
 
+    @ _timed('add_row')
     def add_row(self, *args):
         """
         Add new row to table with custom widgets.
         Example: add_row([Button, text='text'], [TextInput])
         """
         if len(args) == self._cols:
-            row_widget_list = []
-            for num, item in enumerate(args):
-                Cell = type('Cell', (NewCell, item[0]), {})
-                cell = Cell()
-                for key in item[1].keys():
-                    setattr(cell, key, item[1][key])
-                cell.width = self.label_panel.children[
-                    self._cols - num % self._cols - 1].width
-                cell.cell_type = item[0]
-                self.grid.add_widget(cell)
-                # Create widgets row list
-                row_widget_list.append(self.grid.children[0])
-            # Adding a widget to two-level array
-            self._grid._cells.append(row_widget_list)
+            # the new row is at the end, not in the sorted order
+            self._clear_sort()
+            if self._virtual:
+                self._add_virtual_row(args)
+                return
+            cells, labels = [], []
+            lbl = self._add_row_widgets(args, self._label_widths(),
+                                        cells, labels)
+            self._show_row_widgets(cells, labels)
             # when label width set to 'auto', width doesn't set. so set texture_size
-            lbl = NewNumberLabel()
-            lbl.text = str(self.row_count)
-            lbl._label.refresh()
-            lbl.texture_size = lbl._label._size_texture
-            self.number_panel.add_widget(lbl)
+            if lbl is not None:
+                self._measure_number(lbl)
             self.set_col_width()
             # Default the choosing
             if len(self.grid.cells) == 1:
@@ -183,55 +377,733 @@ class Table(FocusBehavior, BoxLayout):
             print('ERROR: Please, add %s strings in method\'s arguments' %
                   str(self._cols))
 
+    @ _timed('add_rows')
+    def add_rows(self, rows):
+        """
+        Add many rows to table with custom widgets. The cells are added
+        to the grid at once, with one column width and one layout pass at
+        the end, but each cell widget is still built with its kv rules,
+        which is most of the time of big tables, use virtual mode for them.
+        rows can be a generator.
+        Example: add_rows([[Button, {'text': str(i)}], [TextInput, {}]]
+                          for i in range(1000))
+        """
+        row_count = self._model.row_count
+        widths = self._label_widths()
+        lbl = None
+        cells, labels = [], []
+        for items in rows:
+            if len(items) != self._cols:
+                print('ERROR: Please, add %s items in each row' %
+                      str(self._cols))
+                continue
+            if self._virtual:
+                self._model.append_row(items)
+                continue
+            lbl = self._add_row_widgets(items, widths, cells, labels) or lbl
+        self._show_row_widgets(cells, labels)
+        if self._virtual:
+            self._trigger_viewport()
+            self.set_col_width()
+        elif lbl is not None:
+            # the last number is the widest one for the number panel
+            self._measure_number(lbl)
+            self.set_col_width()
+        if self._model.row_count != row_count:
+            # the new rows are at the end, not in the sorted order
+            self._clear_sort()
+        # Default the choosing
+        if not row_count and self._model.row_count:
+            self.choose_row(0, True)
+
+    def add_button_rows(self, rows):
+        """
+        Add many rows to table with Button widgets, see add_rows.
+        Example: add_button_rows([('123', 'asd'), ('456', 'zxc')])
+        """
+        self.add_rows([[Button, {'text': item}] for item in row]
+                      for row in rows)
+
+    def set_row_source(self, source, total=None, page_size=None):
+        """
+        Load rows from source in pages, the first page now and the next ones
+        when the view nears the loaded end. source is an iterable of rows
+        (may be an endless generator) or a callable fetch(start, count)
+        returning a list of rows, fewer than count at the end. The rows are
+        the items of add_rows. total is the number of rows of the source, if
+        it is known.
+        Example: set_row_source(([Button, {'text': str(i)}],
+                                 [TextInput, {}]) for i in count())
+        """
+        if callable(source):
+            self._source = source
+        else:
+            self._source = iter(source)
+        self._source_total = total
+        self._source_loaded = 0
+        self._source_done = total == 0
+        self._page_size = page_size or self.default_page_size
+        if self._grid:
+            self.load_more()
+        else:
+            self._trigger_fetch()
+
+    @ property
+    def has_more_rows(self):
+        """ The row source has rows that are not loaded """
+        return not self._source_done
+
+    @ property
+    def total_rows(self):
+        """
+        Number of rows with the not loaded rows of the row source,
+        None while the row source is growing (the end isn't known)
+        """
+        if self._source_done:
+            return self._model.row_count
+        if self._source_total is None:
+            return None
+        return self._model.row_count + self._source_total - \
+            self._source_loaded
+
+    def load_more(self, keep_scroll=True):
+        """
+        Load the next page of the row source, returns the number of the
+        loaded rows. With keep_scroll the view stays on the same rows.
+        """
+        if self._source_done:
+            return 0
+        count = self._page_size
+        if self._source_total is not None:
+            count = min(count, self._source_total - self._source_loaded)
+        if callable(self._source):
+            rows = list(self._source(self._source_loaded, count))
+        else:
+            rows = list(islice(self._source, count))
+        self._source_loaded += len(rows)
+        if len(rows) < count or self._source_loaded == self._source_total:
+            self._source_done = True
+            self._source = None
+        if not rows:
+            return 0
+        view = self._scroll_view
+        top = (1 - view.scroll_y) * max(self._grid.height - view.height, 0)
+        self.add_rows(rows)
+        if self._virtual:
+            height = len(self._model.shown_rows) * self.row_height
+        else:
+            # lay out the new rows now, the scrolling needs their positions
+            self._grid.do_layout()
+            self._grid._trigger_layout.cancel()
+            height = self._grid.height
+        scroll_range = height - view.height
+        if keep_scroll and scroll_range > 0:
+            view.scroll_y = min(max(1 - top / scroll_range, 0), 1)
+            view._update_mouse(view.effect_y, view.scroll_y)
+        return len(rows)
+
+    def _near_end(self):
+        """ The view is less than a view height from the loaded end """
+        view = self._scroll_view
+        if self._virtual:
+            height = len(self._model.shown_rows) * self.row_height
+        else:
+            height = self._grid.height
+        scroll_range = height - view.height
+        return scroll_range < view.height or \
+            view.scroll_y * scroll_range < view.height
+
+    def _check_fetch(self, *args):
+        """
+        Load pages (max_fetch_pages in a frame) while the view is near the
+        loaded end
+        """
+        if self._source_done or not self._grid:
+            return
+        shown = len(self._model.shown_rows)
+        for _ in range(self.max_fetch_pages):
+            if self._source_done or not self._near_end():
+                return
+            self.load_more()
+        # the grid may still not fill the view, unless the filter hid all
+        # the loaded rows: then the next scroll loads more
+        if len(self._model.shown_rows) > shown:
+            self._trigger_fetch()
+
+    def _need_rows(self, step):
+        """
+        Load pages until there are step shown rows after the chosen,
+        max_fetch_pages pages at most
+        """
+        position = self._model.shown_position(self._chosen_row) or 0
+        for _ in range(self.max_fetch_pages):
+            if self._source_done or \
+                    position + step < len(self._model.shown_rows):
+                return
+            self.load_more()
+
+    def load_csv(self, path, delimiter=None, header=True, cell_type=Button,
+                 sort_keys=None, encoding='utf-8', chunk_size=None,
+                 on_progress=None, on_done=None):
+        """
+        Load the rows of a CSV file, TSV for a .tsv path or delimiter '\\t'.
+        The file is parsed in chunks of chunk_size rows (by default 1000
+        with virtual, else 20) on a worker thread, the chunks are added
+        between frames. With header the first line is
+        the column labels. sort_keys are the sort_key of the columns.
+        on_progress(rows, fraction) is called after each chunk,
+        on_done(rows) at the end.
+        Example: load_csv('data.csv', sort_keys=[None, float])
+        """
+        self._stop_csv()
+        if delimiter is None:
+            delimiter = '\t' if splitext(path)[1].lower() == '.tsv' else ','
+        if not chunk_size:
+            chunk_size = 1000 if self._virtual else 20
+        # a few chunks ahead of the UI at most
+        self._csv_chunks = queue.Queue(maxsize=4)
+        self._csv_stop = threading.Event()
+        worker = threading.Thread(
+            target=self._read_csv,
+            args=(path, delimiter, header, cell_type, sort_keys or [],
+                  encoding, chunk_size, self._csv_chunks, self._csv_stop))
+        worker.daemon = True
+        worker.start()
+        self._csv_rows = 0
+        self._csv_callbacks = (on_progress, on_done)
+        Clock.schedule_interval(self._add_csv_chunks, 0)
+
+    def save_csv(self, path, delimiter=None, header=True, encoding='utf-8',
+                 chunk_size=10000, on_progress=None):
+        """
+        Save the shown rows in the current order to a CSV file, TSV for
+        a .tsv path or delimiter '\\t'. The texts come from the model,
+        the widgets aren't used. With header the column labels are the
+        first line. on_progress(rows, fraction) is called after each chunk.
+        Example: save_csv('data.csv')
+        """
+        if delimiter is None:
+            delimiter = '\t' if splitext(path)[1].lower() == '.tsv' else ','
+        texts = [column.texts for column in self._model.columns]
+        rows = self._model.shown_rows
+        with open(path, 'w', newline='', encoding=encoding) as csv_file:
+            writer = csv.writer(csv_file, delimiter=delimiter)
+            if header:
+                writer.writerow([label.text for label in
+                                 self.label_panel.labels[1:self._cols + 1]])
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                writer.writerows([column[row_num] for column in texts]
+                                 for row_num in chunk)
+                if on_progress:
+                    on_progress(start + len(chunk),
+                                (start + len(chunk)) / float(len(rows)))
+
+    @ staticmethod
+    def _read_csv(path, delimiter, header, cell_type, sort_keys, encoding,
+                  chunk_size, chunks, stop):
+        """ Parse a CSV file into chunks of rows (worker thread) """
+        def put(item):
+            # wait for the UI, unless the loading is stopped
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            size = float(getsize(path)) or 1.
+            with open(path, newline='', encoding=encoding) as csv_file:
+                reader = csv.reader(csv_file, delimiter=delimiter)
+                first = next(reader, None)
+                if first is None:
+                    put(None)
+                    return
+                cols = len(first)
+                attrs = [{'sort_key': sort_keys[col]}
+                         if col < len(sort_keys) and sort_keys[col] else {}
+                         for col in range(cols)]
+                if not put(('labels', first if header else None, cols)):
+                    return
+                lines = islice(reader, chunk_size)
+                if not header:
+                    lines = chain([first], lines)
+                while True:
+                    rows = []
+                    for line in lines:
+                        # short lines get empty cells, long ones are cut
+                        if len(line) != cols:
+                            line = (line + [''] * cols)[:cols]
+                        rows.append([[cell_type, dict(attr, text=text)]
+                                     for attr, text in zip(attrs, line)])
+                    if not rows:
+                        break
+                    if not put(('rows', rows,
+                                csv_file.buffer.tell() / size)):
+                        return
+                    lines = islice(reader, chunk_size)
+        except Exception as error:
+            put(error)
+            return
+        put(None)
+
+    def _add_csv_chunks(self, dt):
+        """ Add the parsed chunks for a few milliseconds (each frame) """
+        on_progress, on_done = self._csv_callbacks
+        end_time = time.perf_counter() + .01
+        while time.perf_counter() < end_time:
+            try:
+                item = self._csv_chunks.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self._stop_csv()
+                if on_done:
+                    on_done(self._csv_rows)
+                return
+            if isinstance(item, Exception):
+                self._stop_csv()
+                print('ERROR: CSV loading failed: %s' % item)
+                return
+            if item[0] == 'labels':
+                labels, cols = item[1:]
+                if len(self.label_panel.labels) <= 1:
+                    self.cols = cols
+                elif cols != self._cols:
+                    self._stop_csv()
+                    print('ERROR: Please, load a file with %s columns' %
+                          str(self._cols))
+                    return
+                for col, text in enumerate(labels or []):
+                    self.label_panel.labels[col + 1].text = text
+                continue
+            rows, fraction = item[1:]
+            self.add_rows(rows)
+            self._csv_rows += len(rows)
+            if on_progress:
+                on_progress(self._csv_rows, fraction)
+
+    def _stop_csv(self):
+        """ Stop the CSV loading """
+        if self._csv_stop is not None:
+            self._csv_stop.set()
+            Clock.unschedule(self._add_csv_chunks)
+            self._csv_stop = None
+            self._csv_chunks = None
+
+    def set_model(self, model):
+        """
+        Show the rows of another model, e.g. a SqliteModel, in a virtual
+        table. Without columns the table gets a column for each model
+        column, labeled with its name.
+        Example: set_model(SqliteModel('data.db', 'items'))
+        """
+        if not self._virtual:
+            print('ERROR: Please, set virtual before setting a model')
+            return
+        self._model = model
+        self._grid._model = model
+        self._clear_sort()
+        self._chosen_row = 0
+        self._anchor_row = 0
+        if len(self.label_panel.labels) <= 1:
+            self.cols = len(model.columns)
+            for col, column in enumerate(model.columns):
+                self.label_panel.labels[col + 1].text = \
+                    getattr(column, 'name', str(col))
+        self._trigger_viewport()
+
+    async def append_rows_async(self, rows, batch_size=None):
+        """
+        Add the rows of an async iterable (rows as in add_rows) when Kivy
+        runs under asyncio (App.async_run). The rows received during a frame
+        are added at once in the next frame. A producer that gets
+        batch_size rows ahead (by default 1000 with virtual, else 20) waits
+        for that frame. Cancelling the task drops the rows not added yet.
+        Returns the number of added rows.
+        Example: await append_rows_async(fetch_rows())
+        """
+        if not batch_size:
+            batch_size = 1000 if self._virtual else 20
+        loop = asyncio.get_running_loop()
+        batch = []
+        # resolved when the frame adds the batch
+        added = None
+        event = None
+        count = 0
+
+        def add_batch(dt):
+            nonlocal batch, added, event, count
+            done = added
+            try:
+                self.add_rows(batch)
+                count += len(batch)
+            except Exception as error:
+                # raised by the await, the producer doesn't wait forever
+                done.set_exception(error)
+            else:
+                done.set_result(None)
+            finally:
+                batch, added, event = [], None, None
+
+        try:
+            async for items in rows:
+                batch.append(items)
+                if added is None:
+                    added = loop.create_future()
+                    event = Clock.schedule_once(add_batch, 0)
+                if len(batch) >= batch_size:
+                    # backpressure, wait until the frame takes the batch
+                    await added
+            if added is not None:
+                await added
+        finally:
+            if event is not None:
+                event.cancel()
+            aclose = getattr(rows, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+        return count
+
+    def _label_widths(self):
+        """ Widths of the column labels """
+        return [splitter.width for splitter in
+                reversed(self.label_panel.children[:self._cols])]
+
+    def _add_row_widgets(self, items, widths, cells, labels):
+        """
+        Create the cell widgets of a row, the shown ones are collected in
+        cells and labels for _show_row_widgets. Returns the row number
+        label, None if the filter hides the row.
+        """
+        row_num = len(self._grid._cells)
+        row_widget_list = []
+        for num, item in enumerate(items):
+            cell = NewCell.cell_class(item[0])()
+            for key in item[1].keys():
+                setattr(cell, key, item[1][key])
+            cell.width = widths[num]
+            cell.cell_type = item[0]
+            cell._row = row_num
+            cell._col = num
+            # Create widgets row list
+            row_widget_list.append(cell)
+        # Adding a widget to two-level array
+        self._grid._append_row(row_widget_list)
+        self._model.append_row(items)
+        if not self._model.is_shown(row_num):
+            return None
+        cells.extend(row_widget_list)
+        lbl = NewNumberLabel(text=str(self.row_count),
+                             height=self._grid._row_heights[-1])
+        labels.append(lbl)
+        return lbl
+
+    def _show_row_widgets(self, cells, labels):
+        """ Add the collected cells and number labels in one pass each """
+        if cells:
+            self.grid._add_widgets(cells)
+            self.number_panel._add_widgets(labels)
+
+    def _measure_number(self, lbl):
+        """
+        Set the texture size of a number label from the measured text,
+        the texture is rendered in the next frame (or taken from the cache)
+        """
+        lbl.texture_size = [self._measure_text(lbl.text, lbl.font_name,
+                                               lbl.font_size),
+                            lbl.texture_size[1]]
+
+    def _add_virtual_row(self, items):
+        """ Add a row of cell data without creating widgets """
+        self._model.append_row(items)
+        self._trigger_viewport()
+        self.set_col_width()
+        # Default the choosing
+        if len(self.grid.cells) == 1:
+            self.choose_row(0, True)
+
+    @ _timed('bind_rows')
+    def _update_viewport(self, *args):
+        """ Bind pooled widgets to the rows in view (virtual mode) """
+        if not self._virtual or not self._grid:
+            return
+        row_height = self.row_height
+        rows = self._model.shown_rows
+        total = len(rows)
+        view_height = self._scroll_view.height
+        scroll_range = max(total * row_height - view_height, 0)
+        top = (1 - self._scroll_view.scroll_y) * scroll_range
+        first = min(max(int(top // row_height), 0), total)
+        last = min(first + int(math.ceil(view_height / row_height)) + 1,
+                   total)
+        self._grid._bind_rows(first, rows[first:last], total, row_height,
+                              self._label_widths())
+        self._number_panel._bind_rows(first, last, row_height)
+
+    def _row_y(self, row_num):
+        """ Y position of a row in the grid """
+        if self._virtual:
+            position = self._model.shown_position(row_num) or 0
+            return self._grid.top - (position + 1) * self.row_height
+        return self._grid.cells[row_num][0].y
+
+    def _chosen_hidden(self):
+        """ The chosen row is hidden by the filter or past the last row """
+        return self._chosen_row >= self._model.row_count or \
+            not self._model.is_shown(self._chosen_row)
+
+    def _step_row(self, step):
+        """ The shown row step rows away from the chosen row """
+        rows = self._model.shown_rows
+        position = self._model.shown_position(self._chosen_row)
+        if position is None:
+            position = min(bisect_left(rows, self._chosen_row),
+                           len(rows) - 1)
+        return rows[min(max(position + step, 0), len(rows) - 1)]
+
+    @ property
+    def filters(self):
+        """ Current filter, column number: filter """
+        return self._model.filters
+
+    @ _timed('filter')
+    def set_filter(self, filters=None):
+        """
+        Show only the rows matching all the column filters, the other rows
+        are kept. Filter values can be a CellFilter, a text or number
+        (equal), a (low, high) tuple (range, None for no limit) or a
+        callable taking the cell text. set_filter() shows all rows.
+        Example: set_filter({0: FilterContains('abc'), 1: (10, None)})
+        """
+        chosen_id = None
+        if self._chosen_row < self._model.row_count:
+            chosen_id = self._model.row_id(self._chosen_row)
+        self._model.set_filter(filters)
+        if chosen_id is not None:
+            # a model filtering by query renumbers the rows
+            self._chosen_row = self._model.find_row(chosen_id)
+            if self._chosen_row is None:
+                self._chosen_row = 0
+        self._keep_selection()
+        if self._virtual:
+            self._trigger_viewport()
+        else:
+            self._grid._show_rows(self._model.shown_rows)
+        if self.row_count and self._chosen_hidden():
+            self.choose_row(self._step_row(0), True)
+
+    @ _timed('apply_updates')
+    def apply_updates(self, changes, by_id=False):
+        """
+        Change many cell texts, changes is an iterable of (row, col, text),
+        row is a row number or, with by_id, a row id (model.row_id), which
+        stays the same when rows move. Cells already showing the text are
+        skipped. The widgets get the new texts once in the next frame. An
+        active sort and filter are updated for the changed rows only.
+        Returns the number of changed cells.
+        Example: apply_updates([(0, 1, '12.5'), (7, 2, 'done')])
+        """
+        model = self._model
+        sort_cols = set(col for col, rev in self._sort_keys)
+        filters = model.filters
+        # row ids of the rows whose sort values changed
+        moved = set()
+        shown_changed = False
+        count = 0
+        for row, col, text in changes:
+            row_num = row
+            if by_id:
+                try:
+                    row_num = model.find_row(row)
+                except IndexError:
+                    row_num = None
+                # a deleted row id may find another row
+                if row_num is None or \
+                        not 0 <= row_num < model.row_count or \
+                        model.row_id(row_num) != row:
+                    print('ERROR: No row with id %s...' % str(row))
+                    continue
+            elif not 0 <= row_num < model.row_count:
+                print('ERROR: No row %s...' % str(row))
+                continue
+            if model.columns[col].texts[row_num] == text:
+                continue
+            shown = model.is_shown(row_num)
+            model.set_text(row_num, col, text)
+            count += 1
+            if not self._virtual:
+                self._grid._queue_text(row_num, col, text)
+            if col in sort_cols:
+                moved.add(model.row_id(row_num))
+            if col in filters and model.is_shown(row_num) != shown:
+                shown_changed = True
+        if moved:
+            perm = model.resort([model.find_row(row_id) for row_id in moved],
+                                self._sort_keys)
+            if perm is not None:
+                self._apply_order(perm)
+        if self._virtual and count:
+            self._trigger_viewport()
+        elif shown_changed:
+            self._grid._show_rows(model.shown_rows)
+        if shown_changed and self.row_count and self._chosen_hidden():
+            self.choose_row(self._step_row(0), True)
+        return count
+
+    def _row_height(self, row_num):
+        """ Height of a row in the grid """
+        if self._virtual:
+            return self.row_height
+        return self._grid._row_heights[row_num]
+
+    @ _timed('del_row')
     def del_row(self, number):
         """ Delete a row by number """
-        if len(self.grid.cells) > number:
-            for cell in self.grid.cells[number]:
-                self.grid.remove_widget(cell)
-            del self.grid.cells[number]
-            self.number_panel.remove_widget(self.number_panel.children[0])
-            # If was deleted the chosen row
-            if self._chosen_row == number:
-                self.choose_row(number, True)
-                # self.choose_row(number)
-        else:
+        # the chosen row and the selection move like with del_rows
+        self.del_rows([number])
+
+    @ _timed('del_rows')
+    def del_rows(self, rows):
+        """
+        Delete many rows by number, rows is a slice or an iterable of row
+        numbers. The widgets are removed in one batch and laid out once.
+        Example: del_rows(range(10, 20)), del_rows(slice(0, None, 2))
+        """
+        count = self._model.row_count
+        if isinstance(rows, slice):
+            rows = range(*rows.indices(count))
+        rows = sorted(set(row_num for row_num in rows
+                          if 0 <= row_num < count))
+        if not rows:
             print('ERROR: Nothing to delete...')
+            return
+        if not self._virtual:
+            self._grid._delete_rows(rows)
+        self._model.delete_rows(rows)
+        if self._virtual:
+            self._trigger_viewport()
+        else:
+            self.number_panel._set_rows([self._grid._row_heights[row_num]
+                                         for row_num in
+                                         self._model.shown_rows])
+        # the chosen row moves up by the rows deleted before it
+        position = bisect_left(rows, self._chosen_row)
+        deleted = position < len(rows) and rows[position] == self._chosen_row
+        self._chosen_row -= position
+        if not self._model.row_count:
+            self._chosen_row = 0
+            self._anchor_row = 0
+        elif deleted:
+            self.choose_row(min(self._chosen_row,
+                                self._model.row_count - 1), True)
+        else:
+            self._keep_selection()
+
+    def clear(self):
+        """ Delete all rows """
+        if self._model.row_count:
+            self.del_rows(range(self._model.row_count))
 
     def del_row_all(self):
-        [self.del_row(0) for cell in self.grid.cells[:]]
+        self.clear()
 
+    @ _timed('choose_row')
     def choose_row(self, row_num=0, edit_row=False):
         # def choose_row(self, row_num=0):
         """
-        Choose a row in our table.
+        Choose a row in our table, it becomes the only selected row.
         Example: choose_row(1)
         """
         if len(self.grid.cells) > row_num:
-            for col_num in range(self._cols):
-                old_grid_element = self.grid.cells[self._chosen_row][col_num]
-                current_cell = self.grid.cells[row_num][col_num]
-                old_grid_element._background_color(
-                    old_grid_element.color_widget)
-                current_cell._background_color(current_cell.color_click)
-            self._chosen_row = row_num
+            self._select(row_num, [row_num])
+            self._anchor_row = row_num
             self.on_select()
         elif len(self.grid.cells) == 0:
             print('ERROR: Nothing to choose...')
         else:
-            for col_num in range(self._cols):
-                old_grid_element = self.grid.cells[self._chosen_row][col_num]
-                current_cell = self.grid.cells[-1][col_num]
-                old_grid_element._background_color(
-                    old_grid_element.color_widget)
-                current_cell._background_color(current_cell.color_click)
-            self._chosen_row = row_num
+            self._select(len(self.grid.cells) - 1, [len(self.grid.cells) - 1])
+            self._anchor_row = self._chosen_row
 
         # print('_chosen_row=', self._chosen_row)
         if not edit_row:
-            if self.parent:
-                self.focus_out(self.parent, False)
+            self.focus_out()
             self.focus = True
 
+    @ _timed('extend_selection')
+    def extend_selection(self, row_num):
+        """
+        Select the shown rows from the last chosen row to row_num
+        (shift-click, shift-arrow), row_num becomes the chosen row.
+        Example: extend_selection(100)
+        """
+        if not len(self.grid.cells) > row_num:
+            print('ERROR: Nothing to choose...')
+            return
+        rows = self._model.shown_rows
+        start = self._model.shown_position(self._anchor_row)
+        if start is None:
+            start = min(bisect_left(rows, self._anchor_row), len(rows) - 1)
+        stop = self._model.shown_position(row_num)
+        if stop is None:
+            stop = start
+        start, stop = min(start, stop), max(start, stop)
+        self._select(row_num, rows[start:stop + 1])
+        self.on_select()
+        self.focus_out()
+        self.focus = True
+
+    @ _timed('toggle_row')
+    def toggle_row(self, row_num):
+        """
+        Select or unselect a row keeping the other selected rows
+        (ctrl-click), row_num becomes the chosen row.
+        Example: toggle_row(3)
+        """
+        if not len(self.grid.cells) > row_num:
+            print('ERROR: Nothing to choose...')
+            return
+        self._model.selection.toggle(row_num)
+        self._chosen_row = row_num
+        self._anchor_row = row_num
+        self._grid._paint_selection()
+        self.on_select()
+        self.focus_out()
+        self.focus = True
+
+    def _select(self, row_num, rows):
+        """ Select only rows (a range or a list), row_num is chosen """
+        selection = self._model.selection
+        selection.clear()
+        selection.set(rows)
+        self._chosen_row = row_num
+        self._grid._paint_selection()
+
+    def _keep_selection(self):
+        """ Select the chosen row if rows moved and nothing is selected """
+        self._anchor_row = self._chosen_row
+        if self._chosen_row < self._model.row_count and \
+                not self._model.selection.count():
+            self._select(self._chosen_row, [self._chosen_row])
+
+    def _click_row(self, row_num):
+        """ Choose a clicked row, shift extends and ctrl toggles """
+        if 'shift' in Window.modifiers:
+            self.extend_selection(row_num)
+        elif set(Window.modifiers) & set(['ctrl', 'meta']):
+            self.toggle_row(row_num)
+        else:
+            self.choose_row(row_num)
+
+    def _move_to_row(self, row_num):
+        """ Choose a row with the keyboard, shift extends the selection """
+        if 'shift' in Window.modifiers:
+            self.extend_selection(row_num)
+        else:
+            self.choose_row(row_num)
+
     def _on_focus(self, instance, value, *largs):
         # without this method, error occurred when set focus
         try:
@@ -246,13 +1118,10 @@ class Table(FocusBehavior, BoxLayout):
             return
         if 'col' not in kwargs:
             return
-        col = kwargs['col']
-        width = args[1]
-        if not self._grid or not self._grid._cells:
+        if not self._grid:
             return
-        for row in self._grid._cells:
-            row[col].width = width
-        pass
+        # applied once per frame, while dragging only to the cells in view
+        self._grid._set_col_width(kwargs['col'], args[1])
 
     def get_east_asian_width_count(self, text):
         """ consider double-byte charactor """
@@ -264,10 +1133,43 @@ class Table(FocusBehavior, BoxLayout):
                 count += 1
         return count
 
-    def get_auto_width(self, text):
-        """ adjust width to the text """
-        return self.get_east_asian_width_count(text) * 10
-
+    def get_auto_width(self, text, font_name=DEFAULT_FONT, font_size=None):
+        """ adjust width to the text, measured in the font """
+        if font_size is None:
+            font_size = sp(15)
+        return self._measure_text(text, font_name, font_size)
+
+    @ staticmethod
+    @ lru_cache(maxsize=10000)
+    def _measure_text(text, font_name, font_size):
+        """ Width of a text in a font, the last measures are cached """
+        font = (font_name, font_size)
+        label = Table._measure_labels.get(font)
+        if label is None:
+            label = CoreLabel(font_name=font_name, font_size=font_size)
+            Table._measure_labels[font] = label
+        return label.get_extents(text)[0]
+
+    def get_fit_width(self, col):
+        """
+        Width of a column fitting its label and the texts of all its cells,
+        each one in its own font. The widest text is kept up to date when
+        rows change, so it's measured once for a column.
+        """
+        label = self.label_panel.labels[col + 1].ids.new_label
+        width = self.get_auto_width(label.text, label.font_name,
+                                    label.font_size)
+        if self._model.row_count and col < len(self._model.columns):
+            width = max(width, self._model.column_width(
+                col, self.get_auto_width, _cell_font))
+        return width + self.auto_width_padding
+
+    def autofit(self, col):
+        """ Fit the width of a column to its texts (double-click splitter) """
+        self.label_panel.labels[col + 1].parent.width = \
+            self.get_fit_width(col)
+
+    @ _timed('col_width')
     def set_col_width(self):
         """ set column width """
         col = 0
@@ -280,28 +1182,24 @@ class Table(FocusBehavior, BoxLayout):
                     self.label_panel.children[tcol].width = self.default_col_width
                 elif width == 'auto':
                     self.label_panel.children[tcol].width = \
-                        self.get_auto_width(
-                        self.label_panel.children[tcol].children[1].ids.new_label.text
-                    )
+                        self.get_fit_width(col)
                 else:
                     self.label_panel.children[tcol].width = width
                 col += 1
 
-    def focus_out(self, p, checked):
-        """ focus out """
-        if not checked and p.parent:
-            if not type(p.parent) is WindowSDL:
-                self.focus_out(p.parent, False)
-        if len(p.children):
-            for child in p.children:
-                self.focus_out(child, True)
-        if hasattr(p, 'focus'):
-            p.focus = False
-        pass
+    def focus_out(self, *args):
+        """
+        focus out the widgets holding a keyboard, other than this table.
+        Only focused widgets are visited, not the whole widget tree.
+        """
+        for widget in list(FocusBehavior._keyboards.values()):
+            if widget is not None and widget is not self:
+                widget.focus = False
 
     def _keyboard_closed(self):
         pass
 
+    @ _timed('key_down')
     def _on_keyboard_down(self, keyboard, keycode, text, modifiers):
         """ Method of pressing keyboard  """
         if not self.focus:
@@ -324,33 +1222,107 @@ class Table(FocusBehavior, BoxLayout):
         if keycode[0] == 279:   # End
             # print(keycode)
             self.scroll_view.end()
+        if keycode[0] == 284:   # F3
+            self.find_next()
+        elif text and text.isprintable() and \
+                not set(modifiers) & set(['ctrl', 'alt', 'meta']):
+            self._type_ahead(text)
 
-    def sort_list(self, col, rev):
-        """ sort by row """
-        if not len(self._grid.cells):
-            return
+    @ property
+    def search_col(self):
+        """
+        Get/set the column of the type-ahead search,
+        by default the first sorted column (or the first column)
+        """
+        if self._search_col is not None:
+            return self._search_col
+        if self._sort_keys:
+            return self._sort_keys[0][0]
+        return 0
 
-        data_list = []
-        for row_num, cell in enumerate(self._grid.cells):
-            data = []
-            for col_num in range(self._cols):
-                data.append(cell[col_num].text)
-            data_list.append(data)
+    @ search_col.setter
+    def search_col(self, col):
+        self._search_col = col
 
-        sort_key = self._grid.cells[0][col].sort_key
-        if sort_key:
-            try:
-                data_list.sort(key=lambda x: (
-                    sort_key(x[col])), reverse=rev)
-            except Exception:
-                data_list.sort(key=lambda x: x[col], reverse=rev)
+    def find(self, text, col=None, next=False):
+        """
+        Choose the first row whose text in col starts with text (ignoring
+        case, in the order of the column texts, reversed when col is sorted
+        descending) and scroll to it. With next, the match after the chosen
+        row. Returns the row number, None if nothing matches.
+        Example: find('abc', 1)
+        """
+        if col is None:
+            col = self.search_col
+        if not text or not self._model.row_count:
+            return None
+        # a column sorted descending shows the matches the other way round
+        rev = bool(self._sort_keys) and self._sort_keys[0] == (col, True)
+        row_num = self._model.find_prefix(
+            col, text, self._chosen_row if next else None, rev)
+        if row_num is not None:
+            self.choose_row(row_num)
+            self.scroll_view.scroll_to_row(row_num)
+        return row_num
+
+    def find_next(self):
+        """ Choose the next match of the last search """
+        return self.find(self._search_text, next=True)
+
+    def _type_ahead(self, text):
+        """ Search the typed characters """
+        now = Clock.get_time()
+        if now - self._search_time > self.search_timeout:
+            self._search_text = ''
+        self._search_time = now
+        search_text = self._search_text + text
+        if search_text == text * len(search_text) and len(search_text) > 1:
+            # the same key again goes to the next match
+            self.find(text, next=True)
+            return
+        self._search_text = search_text
+        chosen_text = self._model.columns[self.search_col].texts[
+            self._chosen_row] if self._chosen_row < self._model.row_count \
+            else ''
+        if not chosen_text.lower().startswith(search_text.lower()):
+            self.find(search_text)
+
+    @ _timed('sort')
+    def sort_list(self, col, rev, add=False):
+        """
+        sort by row. With add the column is added to the current sort
+        keys (shift-click on a column label) for a multi-column sort.
+        Rows are moved as a whole, with their data and colors.
+        """
+        if not self._model.row_count:
+            return
+
+        if not add:
+            keys = [(col, rev)]
+        elif col in [key[0] for key in self._sort_keys]:
+            keys = [(col, rev) if key[0] == col else key
+                    for key in self._sort_keys]
         else:
-            data_list.sort(key=lambda x: x[col], reverse=rev)
-        for row_num, cell in enumerate(self._grid.cells):
-            for col_num in range(self._cols):
-                cell[col_num].text = data_list[row_num][col_num]
+            keys = self._sort_keys + [(col, rev)]
+        self._sort_keys = keys
+        self._apply_order(self._model.sort_order(keys))
 
-        # delete △ mark
+        self._del_sort_marks()
+        # add △ mark
+        for col, rev in keys:
+            self._add_sort_mark(col, rev)
+
+    def _clear_sort(self):
+        """
+        Forget the sort, rows added at the end leave the table unsorted
+        (apply_updates resorts only a sorted table)
+        """
+        if self._sort_keys:
+            self._sort_keys = []
+            self._del_sort_marks()
+
+    def _del_sort_marks(self):
+        """ Delete the △ marks """
         for parent in self._label_panel.children:
             if isinstance(parent, NullLabel):
                 continue
@@ -359,7 +1331,23 @@ class Table(FocusBehavior, BoxLayout):
                 child.remove(child[2])
                 child.remove(child[1])
 
-        # add △ mark
+    def _apply_order(self, perm):
+        """ Reorder the rows, perm[new row] is the old row """
+        # the chosen row moves with its data
+        chosen_id = None
+        if self._chosen_row < self._model.row_count:
+            chosen_id = self._model.row_id(self._chosen_row)
+        self._model.permute(perm)
+        if chosen_id is not None:
+            self._chosen_row = self._model.find_row(chosen_id)
+        self._keep_selection()
+        if self._virtual:
+            self._trigger_viewport()
+        else:
+            self._grid._permute(perm)
+
+    def _add_sort_mark(self, col, rev):
+        """ Draw the △ mark of a sorted column """
         cols = len(self._label_panel.children) - 1
         label_col = self._label_panel.children[cols - col - 1].children[1]
         points = [
@@ -373,7 +1361,6 @@ class Table(FocusBehavior, BoxLayout):
         ]
         label_col.canvas.after.add(
             Line(points=points, width=1, close=True))
-        pass
 
     def on_select(self, *args, **kwargs):
         """ override this method when customize the action """
@@ -383,10 +1370,17 @@ class Table(FocusBehavior, BoxLayout):
 class ScrollViewTable(ScrollView):
     """ScrollView for grid table"""
 
+    # TableStats of the table, while the operations are recorded
+    _stats = None
+
     def __init__(self, **kwargs):
         super(ScrollViewTable, self).__init__(**kwargs)
-        self.bind(size=self._redraw_widget)
         self._color = [.2, .2, .2, 1]
+        # Background, updated in place
+        with self.canvas.before:
+            self._bg_color = Color(*self._color)
+            self._bg_rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._redraw_widget, size=self._redraw_widget)
         # Start scroll_y position
         self.scroll_y = 1
 
@@ -397,25 +1391,19 @@ class ScrollViewTable(ScrollView):
 
     @ color.setter
     def color(self, color):
-        with self.canvas.before:
-            # Not clear, because error
-            self._color = color
-            Color(*self._color)
+        self._color = color
         self._redraw_widget()
 
+    @ _timed('up')
     def up(self, row_num=1):
         """ Scrolling up when the chosen row is out of view """
         if self.size != [100.0, 100.0] and (self.parent.row_count != 0):
-            if self.parent._chosen_row - row_num > 0:
-                self.parent.choose_row(self.parent._chosen_row - row_num)
-            else:
-                self.parent.choose_row(0)
+            self.parent._move_to_row(self.parent._step_row(-row_num))
             grid_height = float(self.children[0].height)
             scroll_height = float(grid_height - self.height)
-            cur_cell = self.children[0].children[0].\
-                cells[self.parent._chosen_row][0]
-            cur_cell_height = float(cur_cell.height)
-            cur_row_y = float(cur_cell.y)
+            cur_cell_height = float(
+                self.parent._row_height(self.parent._chosen_row))
+            cur_row_y = float(self.parent._row_y(self.parent._chosen_row))
             # The convert scroll Y position
             _scroll_y = self.scroll_y * scroll_height + self.height - \
                 cur_cell_height
@@ -439,19 +1427,17 @@ class ScrollViewTable(ScrollView):
                 self.scroll_y = 1
             self._update_mouse(self.effect_y, self.scroll_y)
 
+    @ _timed('down')
     def down(self, row_num=1):
         """ Scrolling down when the chosen row is out of view """
+        self.parent._need_rows(row_num)
         if self.size != [100.0, 100.0] and (self.parent.row_count != 0):
-            if self.parent._chosen_row + row_num < self.parent.row_count - 1:
-                self.parent.choose_row(self.parent._chosen_row + row_num)
-            else:
-                self.parent.choose_row(self.parent.row_count - 1)
+            self.parent._move_to_row(self.parent._step_row(row_num))
             grid_height = float(self.children[0].height)
             scroll_height = float(grid_height - self.height)
-            cur_cell = self.children[0].children[0].\
-                cells[self.parent._chosen_row][0]
-            cur_cell_height = float(cur_cell.height)
-            cur_row_y = float(cur_cell.y)
+            cur_cell_height = float(
+                self.parent._row_height(self.parent._chosen_row))
+            cur_row_y = float(self.parent._row_y(self.parent._chosen_row))
             # The convert scroll Y position
             _scroll_y = self.scroll_y * scroll_height
             # Jump to the chosen row
@@ -474,25 +1460,45 @@ class ScrollViewTable(ScrollView):
                 self.scroll_y = 0
             self._update_mouse(self.effect_y, self.scroll_y)
 
+    @ _timed('home')
     def home(self):
         """ Scrolling to the top of the table """
         if self.parent.row_count != 0:
             self.scroll_y = 1
-            self.parent.choose_row(0)
+            self.parent._move_to_row(self.parent._model.shown_rows[0])
             self._update_mouse(self.effect_y, self.scroll_y)
 
+    @ _timed('end')
     def end(self):
-        """ Scrolling to the bottom of the table """
+        """
+        Scrolling to the bottom of the table, the next page of the row source
+        is loaded first
+        """
+        self.parent.load_more(keep_scroll=False)
         if self.parent.row_count != 0:
             self.scroll_y = 0
-            self.parent.choose_row(self.parent.row_count - 1)
+            self.parent._move_to_row(self.parent._model.shown_rows[-1])
             self._update_mouse(self.effect_y, self.scroll_y)
 
+    @ _timed('scroll_to_row')
+    def scroll_to_row(self, row_num):
+        """ Scrolling to a row, to the middle of the view """
+        grid_height = float(self.children[0].height)
+        scroll_height = float(grid_height - self.height)
+        if scroll_height <= 0:
+            return
+        row_y = float(self.parent._row_y(row_num))
+        self.scroll_y = min(max(
+            (row_y - self.height / 2) / scroll_height, 0), 1)
+        self._update_mouse(self.effect_y, self.scroll_y)
+
+    @ _timed('pgup')
     def pgup(self, row_count=10):
         """ Scrolling up when the chosen row is out of view, but with step """
         if self.parent.row_count != 0:
             self.up(row_count)
 
+    @ _timed('pgdn')
     def pgdn(self, row_count=10):
         """
         Scrolling down when the chosen row is out of view, but with step
@@ -507,8 +1513,9 @@ class ScrollViewTable(ScrollView):
 
     def _redraw_widget(self, *args):
         """ Method of redraw this widget """
-        with self.canvas.before:
-            Rectangle(pos=self.pos, size=self.size)
+        self._bg_color.rgba = self._color
+        self._bg_rect.pos = self.pos
+        self._bg_rect.size = self.size
         # Editting the number panel width
         number_panel = self.children[0].children[1]
         if number_panel.auto_width and len(number_panel.children) > 0:
@@ -563,13 +1570,17 @@ class LabelPanel(BoxLayout):
 
     def __init__(self, **kwargs):
         super(LabelPanel, self).__init__(**kwargs)
-        self.bind(size=self._redraw_widget)
         # for scroll
         self.bind(minimum_height=self.setter('height'))
         self.bind(minimum_width=self.setter('width'))
         self._visible = True
         self._height = 30
         self._color = [.2, .2, .2, 1]
+        # Background, updated in place
+        with self.canvas.before:
+            self._bg_color = Color(*self._color)
+            self._bg_rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._redraw_widget, size=self._redraw_widget)
 
     @ property
     def labels(self):
@@ -617,24 +1628,125 @@ class LabelPanel(BoxLayout):
 
     def _redraw_widget(self, *args):
         """ Method of redraw this widget """
-        with self.canvas.before:
-            self.canvas.before.clear()
-            if len(self.children) > 0:
-                self.children[-1].color = self._color
-            Color(*self._color)
-            Rectangle(pos=self.pos, size=self.size)
-
-
-class NumberPanel(BoxLayout):
+        if len(self.children) > 0:
+            self.children[-1].color = self._color
+        self._bg_color.rgba = self._color
+        self._bg_rect.pos = self.pos
+        self._bg_rect.size = self.size
+
+
+class BatchLayout(object):
+    """
+    Layout adding and removing many child widgets at once. It does what
+    add_widget and remove_widget of Widget, Layout and BoxLayout do, as of
+    Kivy 2.3 (the motion filter is there from 2.1): keep it in step with
+    them when Kivy changes.
+    """
+
+    def _layout_properties(self):
+        """ Child properties bound to _trigger_layout """
+        names = ('size', 'size_hint', 'size_hint_min', 'size_hint_max')
+        if isinstance(self, BoxLayout):
+            names += ('pos_hint',)
+        return names
+
+    def _add_widgets(self, widgets):
+        """
+        Add child widgets in one pass, in front of the children like
+        add_widget. add_widget inserts each one at the start of the list.
+        """
+        update_motion_filter = getattr(self, '_update_motion_filter', None)
+        for widget in widgets:
+            if widget.parent is not None:
+                raise WidgetException('Cannot add %r, it already has a '
+                                      'parent %r' % (widget, widget.parent))
+            widget.parent = self
+            widget.inc_disabled(self._disabled_count)
+            self.canvas.add(widget.canvas)
+            for name in self._layout_properties():
+                widget.fbind(name, self._trigger_layout)
+            if update_motion_filter is not None:
+                # Kivy 2.1+
+                for type_id in widget.motion_filter:
+                    self.register_for_motion_event(type_id, widget)
+                widget.fbind('motion_filter', update_motion_filter)
+        self.children = widgets[::-1] + self.children
+
+    def _remove_widgets(self, widgets):
+        """
+        Remove child widgets in one pass. remove_widget searches the
+        children and the canvas for each widget, here they're rebuilt once.
+        """
+        removed = set(map(id, widgets))
+        children = [child for child in self.children
+                    if id(child) not in removed]
+        # clear keeps canvas.before and canvas.after, add the others back
+        removed_canvases = set(id(widget.canvas) for widget in widgets)
+        instructions = list(self.canvas.children)
+        self.canvas.clear()
+        removed_canvases.update(map(id, self.canvas.children))
+        for instruction in instructions:
+            if id(instruction) not in removed_canvases:
+                self.canvas.add(instruction)
+        update_motion_filter = getattr(self, '_update_motion_filter', None)
+        for widget in widgets:
+            for name in self._layout_properties():
+                widget.funbind(name, self._trigger_layout)
+            if update_motion_filter is not None:
+                # Kivy 2.1+
+                for type_id in widget.motion_filter:
+                    self.unregister_for_motion_event(type_id, widget)
+                widget.funbind('motion_filter', update_motion_filter)
+            widget.parent = None
+            widget.dec_disabled(self._disabled_count)
+        self.children = children
+
+
+class NumberPanel(BatchLayout, BoxLayout):
     """Num panel class"""
 
     def __init__(self, **kwargs):
         super(NumberPanel, self).__init__(**kwargs)
-        self.bind(size=self._redraw_widget)
         self._visible = True
         self._width = 30
         self._color = [.2, .2, .2, 1]
         self._auto_width = True
+        # Background, updated in place
+        with self.canvas.before:
+            self._bg_color = Color(*self._color)
+            self._bg_rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._redraw_widget, size=self._redraw_widget)
+
+    def _set_row_height(self, position, height):
+        """ Set the height of the number label at a shown row position """
+        if position is not None and position < len(self.children):
+            self.children[-(position + 1)].height = height
+
+    def _set_rows(self, heights):
+        """ Number the shown rows 1..n, heights of each row """
+        labels = self.children[::-1]
+        while len(labels) < len(heights):
+            labels.append(NewNumberLabel())
+            self.add_widget(labels[-1])
+        if len(labels) > len(heights):
+            self._remove_widgets(labels[len(heights):])
+            del labels[len(heights):]
+        for num, lbl in enumerate(labels):
+            lbl.text = str(num + 1)
+            lbl.height = heights[num]
+
+    def _bind_rows(self, first, last, row_height):
+        """ Show number labels only for rows first..last (virtual mode) """
+        labels = self.children[::-1]
+        while len(labels) < last - first:
+            labels.append(NewNumberLabel())
+            self.add_widget(labels[-1])
+        while len(labels) > last - first:
+            self.remove_widget(labels.pop())
+        for num, lbl in enumerate(labels):
+            lbl.text = str(first + num + 1)
+            lbl.height = row_height
+        self.padding = [0, first * row_height, 0, 0]
 
     @ property
     def auto_width(self):
@@ -689,15 +1801,17 @@ class NumberPanel(BoxLayout):
 
     def _redraw_widget(self, *args):
         """ Method of redraw this widget """
-        with self.canvas.before:
-            self.canvas.before.clear()
-            Color(*self._color)
-            Rectangle(pos=self.pos, size=self.size)
+        self._bg_color.rgba = self._color
+        self._bg_rect.pos = self.pos
+        self._bg_rect.size = self.size
 
 
-class GridTable(GridLayout):
+class GridTable(BatchLayout, GridLayout):
     """This is the table itself"""
 
+    # TableStats of the table, while the operations are recorded
+    _stats = None
+
     def __init__(self, **kwargs):
         super(GridTable, self).__init__(**kwargs)
         self.bind(size=self._redraw_widget)
@@ -706,7 +1820,47 @@ class GridTable(GridLayout):
         self.bind(minimum_width=self.setter('width'))
         self._color = [.2, .2, .2, 1]
         self._cells = []
+        # Row heights, shared with the number panel
+        self._row_heights = []
+        self._resized_rows = {}
+        self._trigger_row_heights = Clock.create_trigger(
+            self._update_row_heights)
+        # Column widths read by the layout, None to use the cell widths.
+        # Cells out of view get a new width after the resizing stops.
+        self._col_widths = []
+        self._widths_stale = False
+        self._trigger_col_widths = Clock.create_trigger(
+            self._apply_col_widths)
+        self._trigger_all_widths = Clock.create_trigger(
+            self._apply_all_widths, .3)
+        # Children of the last full layout, while only widths change the
+        # layout places the rows in view
+        self._laid_out_children = None
+        self._laid_out_count = 0
+        # Selection colors of the rows in view, before the next frame
+        self._trigger_paint = Clock.create_trigger(self._paint_selection, -1)
         self._current_cell = None
+        self._model = None
+        # Skip model updates while the table writes to cell widgets
+        self._syncing = False
+        # Texts of apply_updates, written to the cell widgets once a frame
+        self._pending_texts = {}
+        self._trigger_texts = Clock.create_trigger(self._apply_texts)
+        # Virtual mode: widgets bound to the rows in view, free widgets
+        self._virtual = False
+        self._slots = []
+        self._slot_rows = {}
+        self._pool = {}
+        # Read-only cells drawn on the canvas, with the geometry of the rows
+        # in view: position of the first one, count of shown rows, height
+        self._drawn_count = 0
+        self._drawn_group = InstructionGroup()
+        self.canvas.after.add(self._drawn_group)
+        self._slot_first = 0
+        self._slot_total = 0
+        self._slot_height = 0
+        self._slot_widths = []
+        self._col_lefts = [0]
 
     @ property
     def current_cell(self):
@@ -730,39 +1884,602 @@ class GridTable(GridLayout):
     @ property
     def cells(self):
         """ Two-level array of cells """
+        if self._virtual:
+            return VirtualRows(self)
         return self._cells
 
     def _get_row_index(self, item_object):
         """ Get select item index """
-        for index, child in enumerate(reversed(self.children)):
-            if item_object == child:
-                columns = self.parent.parent.parent._cols
-                row_index = math.floor(index / columns)
-                # print(str(row_index), 'row is chosen')
-                return row_index
-                break
+        return item_object._row
+
+    def _append_row(self, row_widget_list):
+        """ Add a row of cell widgets to the two-level array """
+        self._cells.append(row_widget_list)
+        self._row_heights.append(max(cell.height
+                                     for cell in row_widget_list))
+
+    def _on_cell_height(self, cell):
+        """ Collect the resized rows, they're updated once per frame """
+        if cell._row < len(self._cells):
+            row = self._cells[cell._row]
+            self._resized_rows[id(row)] = row
+            self._trigger_row_heights()
+
+    @ _timed('row_heights')
+    def _update_row_heights(self, *args):
+        """ Update the heights of the resized rows and their number labels """
+        number_panel = self.parent.children[1]
+        for row in self._resized_rows.values():
+            row_num = row[0]._row
+            # skip deleted rows
+            if row_num >= len(self._cells) or self._cells[row_num] is not row:
+                continue
+            height = max(cell.height for cell in row)
+            self._row_heights[row_num] = height
+            number_panel._set_row_height(
+                self._model.shown_position(row_num), height)
+        self._resized_rows.clear()
+
+    def _set_col_width(self, col, width):
+        """ Set the width of a column, it's applied once per frame """
+        while len(self._col_widths) <= col:
+            self._col_widths.append(None)
+        self._col_widths[col] = width
+        self._widths_stale = True
+        self._trigger_col_widths()
+
+    @ _timed('col_widths')
+    def _apply_col_widths(self, *args):
+        """ Lay out the new column widths and resize the cells in view """
+        if not self._widths_stale:
+            return
+        self._trigger_layout()
+        if self._virtual:
+            # only the pooled widgets exist, the rest get it when bound
+            self._resize_cells(self._slots)
+            self._widths_stale = False
+            return
+        self._resize_cells(self._cells[row_num]
+                           for row_num in self._visible_rows())
+        # the other cells when the resizing stops
+        self._trigger_all_widths.cancel()
+        self._trigger_all_widths()
+
+    @ _timed('col_widths_all')
+    def _apply_all_widths(self, *args):
+        """ Resize the cells out of view to the column widths """
+        self._resize_cells(self._cells)
+        self._widths_stale = False
+        # place all the rows again
+        self._trigger_layout()
+
+    def _resize_cells(self, rows):
+        """ Set the column widths to the cells of rows """
+        widths = self._col_widths
+        for row in rows:
+            for cell, width in zip(row, widths):
+                if width is not None:
+                    cell.width = width
+
+    def _visible_rows(self):
+        """ Shown rows in view, found by the laid out cell positions """
+        view = self.parent.parent
+        scroll_range = self.parent.height - view.height
+        bottom = view.scroll_y * scroll_range if scroll_range > 0 else \
+            scroll_range
+        rows = self._model.shown_rows
+        first = self._position_below(rows, bottom + view.height)
+        # the row at the bottom of the view starts below it
+        last = self._position_below(rows, bottom, first) + 1
+        return rows[first:last]
+
+    def _position_below(self, rows, y, low=0):
+        """ Position of the first row starting below y, rows go down """
+        high = len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self._cells[rows[middle]][0].y < y:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    @ _timed('paint_selection')
+    def _paint_selection(self, *args):
+        """
+        Paint the selected rows in view, only the cells whose selection
+        changed. The other rows are painted when they come into view.
+        """
+        if self._model is None:
+            return
+        selection = self._model.selection
+        if self._virtual:
+            rows = ((row_num, self._slots[slot_num])
+                    for row_num, slot_num in self._slot_rows.items())
+        else:
+            rows = ((row_num, self._cells[row_num])
+                    for row_num in self._visible_rows())
+        for row_num, cells in rows:
+            selected = row_num in selection
+            for cell in cells:
+                if cell._selected != selected:
+                    cell._selected = selected
+                    cell._background_color(
+                        cell.color_click if selected else cell.color_widget)
+
+    @ _timed('grid_layout')
+    def do_layout(self, *largs):
+        if self._virtual and self._drawn_count:
+            # drawn cells aren't children, the rows are placed here
+            self._layout_slots()
+            return
+        if not self._virtual and self._widths_stale and \
+                self._laid_out_count and \
+                self.children is self._laid_out_children and \
+                len(self.children) == self._laid_out_count:
+            # a column is being resized, the rows didn't change
+            self._layout_visible_cols()
+            return
+        super(GridTable, self).do_layout(*largs)
+        self._laid_out_children = self.children
+        self._laid_out_count = len(self.children)
+        # rows moved into view get their selection colors, once the parent
+        # got the new height too
+        if not self._virtual:
+            self._trigger_paint()
+
+    def _layout_visible_cols(self):
+        """
+        Place the columns of the rows in view with the new column widths,
+        the rows keep their y. The others are placed when the resizing stops.
+        """
+        widths = list(self._cols)
+        for col, width in enumerate(self._col_widths[:len(widths)]):
+            if width is not None:
+                widths[col] = width
+        left, top, right, bottom = self.padding
+        spacing = self.spacing[0]
+        lefts = []
+        x = self.x + left
+        for width in widths:
+            lefts.append(x)
+            x += width + spacing
+        self.minimum_width = sum(widths) + left + right + \
+            spacing * (len(widths) - 1)
+        for row_num in self._visible_rows():
+            for cell, x, width in zip(self._cells[row_num], lefts, widths):
+                cell.x = x
+                cell.width = width
+
+    def _layout_slots(self):
+        """ Place the widgets and the drawn cells of the rows in view """
+        row_height = self._slot_height
+        widths = list(self._slot_widths)
+        for col, width in enumerate(self._col_widths[:len(widths)]):
+            if width is not None:
+                widths[col] = width
+        lefts = [0]
+        for width in widths:
+            lefts.append(lefts[-1] + width)
+        self._col_lefts = lefts
+        self.minimum_width = lefts[-1]
+        self.minimum_height = self._slot_total * row_height
+        top = self.top - self._slot_first * row_height
+        for slot_num, slot in enumerate(self._slots):
+            y = top - (slot_num + 1) * row_height
+            for col, cell in enumerate(slot):
+                if isinstance(cell, CellDrawing):
+                    cell.place(self.x + lefts[col], y, widths[col],
+                               row_height)
+                else:
+                    cell.pos = (self.x + lefts[col], y)
+                    cell.size = (widths[col], row_height)
+
+    def _drawing_at(self, x, y):
+        """ Drawn cell at a position of the grid, None if there's none """
+        if not self._slot_height:
+            return None
+        slot_num = int((self.top - y) // self._slot_height) - \
+            self._slot_first
+        col = bisect_right(self._col_lefts, x - self.x) - 1
+        if not 0 <= slot_num < len(self._slots) or \
+                not 0 <= col < len(self._slots[slot_num]):
+            return None
+        cell = self._slots[slot_num][col]
+        return cell if isinstance(cell, CellDrawing) else None
+
+    def on_touch_down(self, touch):
+        """ Clicks on drawn cells are found by the position """
+        if self._drawn_count and self.collide_point(*touch.pos) and \
+                not touch.is_mouse_scrolling:
+            cell = self._drawing_at(*touch.pos)
+            if cell is not None:
+                self.current_cell = VirtualCell(self, cell._row, cell._col)
+                # GridTable -> ScrollViewBoxLayout -> ScrollViewTable -> Table
+                self.parent.parent.parent._click_row(cell._row)
+                return True
+        return super(GridTable, self).on_touch_down(touch)
+
+    def _fill_rows_cols_sizes(self):
+        """ Column widths come from the table, not from the cell widgets """
+        super(GridTable, self)._fill_rows_cols_sizes()
+        cols = self._cols
+        for col, width in enumerate(self._col_widths[:len(cols)]):
+            if width is not None:
+                cols[col] = width
+
+    def _permute(self, perm):
+        """ Reorder the cell widget rows, perm[new row] is the old row """
+        self._cells = [self._cells[i] for i in perm]
+        self._row_heights = [self._row_heights[i] for i in perm]
+        self._reindex()
+        rows = self._model.shown_rows
+        self.children = [cell for row_num in reversed(rows)
+                         for cell in reversed(self._cells[row_num])]
+        number_panel = self.parent.children[1]
+        for position, row_num in enumerate(rows):
+            number_panel._set_row_height(position,
+                                         self._row_heights[row_num])
+
+    def _show_rows(self, rows):
+        """ Show only the cell widgets of rows (filter) """
+        cells = [cell for row_num in rows for cell in self._cells[row_num]]
+        shown = set(map(id, cells))
+        self._remove_widgets([cell for cell in self.children
+                              if id(cell) not in shown])
+        self._add_widgets([cell for cell in cells if cell.parent is None])
+        self.children = cells[::-1]
+        self.parent.children[1]._set_rows(
+            [self._row_heights[row_num] for row_num in rows])
+
+    def _delete_rows(self, rows):
+        """ Delete the cell widget rows of rows, ascending row numbers """
+        deleted = set(rows)
+        self._remove_widgets([cell for row_num in rows
+                              for cell in self._cells[row_num]
+                              if cell.parent is not None])
+        self._cells = [row for row_num, row in enumerate(self._cells)
+                       if row_num not in deleted]
+        self._row_heights = [height for row_num, height
+                             in enumerate(self._row_heights)
+                             if row_num not in deleted]
+        self._reindex(rows[0])
+
+    def _queue_text(self, row_num, col, text):
+        """ Write a text to a cell widget in the next frame """
+        cell = self._cells[row_num][col]
+        # the widget moves with its row, so it's the key
+        self._pending_texts[id(cell)] = (cell, text)
+        self._trigger_texts()
+
+    @ _timed('cell_texts')
+    def _apply_texts(self, *args):
+        """ Write the queued texts to the cell widgets """
+        self._syncing = True
+        for cell, text in self._pending_texts.values():
+            cell.text = text
+        self._syncing = False
+        self._pending_texts.clear()
+
+    def _reindex(self, start=0):
+        """ Renumber the cells from row start on """
+        for row_num in range(start, len(self._cells)):
+            for cell in self._cells[row_num]:
+                cell._row = row_num
+
+    def _acquire_cell(self, cell_type):
+        """
+        Get a cell widget from the pool or create it,
+        a CellDrawing for a DrawnCell type
+        """
+        pool = self._pool.get(cell_type)
+        if pool:
+            cell = pool.pop()
+        elif issubclass(cell_type, DrawnCell):
+            cell = CellDrawing(cell_type)
+        else:
+            cell = NewCell.cell_class(cell_type)()
+            cell.cell_type = cell_type
+            cell._pooled = True
+        if isinstance(cell, CellDrawing):
+            self._drawn_group.add(cell.group)
+            self._drawn_count += 1
+        return cell
+
+    def _release_cell(self, cell):
+        """ Return a cell widget to the pool """
+        if isinstance(cell, CellDrawing):
+            self._drawn_group.remove(cell.group)
+            self._drawn_count -= 1
+        self._pool.setdefault(cell.cell_type, []).append(cell)
+
+    def _widget_at(self, row_num, col_num):
+        """ Widget showing the cell, None when it is out of view or drawn """
+        slot_num = self._slot_rows.get(row_num)
+        if slot_num is None:
+            return None
+        cell = self._slots[slot_num][col_num]
+        return None if isinstance(cell, CellDrawing) else cell
+
+    def _redraw_cell(self, row_num, col_num):
+        """ Draw a changed drawn cell again, if it's in view """
+        slot_num = self._slot_rows.get(row_num)
+        if slot_num is None:
+            return
+        cell = self._slots[slot_num][col_num]
+        if isinstance(cell, CellDrawing):
+            self._bind_drawing(cell, row_num, col_num,
+                               row_num in self._model.selection)
+            self._trigger_layout()
+
+    def _on_cell_text(self, cell, text):
+        """ Keep the model in sync with an edited cell widget """
+        if self._syncing or self._model is None:
+            return
+        row_num = self._get_row_index(cell)
+        if row_num is not None and row_num < self._model.row_count:
+            self._model.set_text(row_num, cell._col, text)
+
+    def _bind_cell(self, cell, row_num, col_num, selected):
+        """ Show a model cell in the widget """
+        column = self._model.columns[col_num]
+        attrs = column.attrs[row_num]
+        # reset what the previous row set and this one doesn't
+        for key in cell._attrs:
+            if key not in attrs and key in VirtualCell.defaults:
+                setattr(cell, key, VirtualCell.defaults[key])
+        cell._row = row_num
+        self._syncing = True
+        cell.text = column.texts[row_num]
+        for key, value in attrs.items():
+            setattr(cell, key, value)
+        self._syncing = False
+        cell._attrs = attrs
+        cell._selected = selected
+        if selected:
+            cell.background_color = attrs.get(
+                'color_click', VirtualCell.defaults['color_click'])
+        else:
+            cell.background_color = attrs.get(
+                'color_widget', VirtualCell.defaults['color_widget'])
+
+    def _bind_drawing(self, cell, row_num, col_num, selected):
+        """ Show a model cell in a CellDrawing """
+        column = self._model.columns[col_num]
+        cell._row = row_num
+        cell.show(column.texts[row_num], column.attrs[row_num], selected)
+
+    def _bind_rows(self, first, rows, total, row_height, widths):
+        """
+        Bind pooled widgets to rows, the shown rows from position first
+        on (virtual mode). total is the number of shown rows.
+        """
+        columns = self._model.columns
+        selection = self._model.selection
+        slots = self._slots
+        while len(slots) > len(rows):
+            for cell in slots.pop():
+                self._release_cell(cell)
+        widgets = []
+        self._slot_rows = {}
+        for slot_num, row_num in enumerate(rows):
+            self._slot_rows[row_num] = slot_num
+            if slot_num == len(slots):
+                slots.append([])
+            slot = slots[slot_num]
+            for col_num, column in enumerate(columns):
+                cell_type = column.cell_types[row_num]
+                cell = slot[col_num] if col_num < len(slot) else None
+                if cell is None or cell.cell_type is not cell_type:
+                    if cell is not None:
+                        self._release_cell(cell)
+                    cell = self._acquire_cell(cell_type)
+                    cell._col = col_num
+                    if col_num < len(slot):
+                        slot[col_num] = cell
+                    else:
+                        slot.append(cell)
+                cell.size = (widths[col_num], row_height)
+                if isinstance(cell, CellDrawing):
+                    self._bind_drawing(cell, row_num, col_num,
+                                       row_num in selection)
+                    continue
+                self._bind_cell(cell, row_num, col_num,
+                                row_num in selection)
+                widgets.append(cell)
+        if widgets != self.children[::-1]:
+            self.clear_widgets()
+            for cell in widgets:
+                self.add_widget(cell)
+        self._slot_first = first
+        self._slot_total = total
+        self._slot_height = row_height
+        self._slot_widths = widths
+        self.padding = [0, first * row_height,
+                        0, (total - first - len(rows)) * row_height]
+        if self._drawn_count:
+            self._trigger_layout()
 
     def _redraw_widget(self, *args):
         """ Method of redraw this widget """
         self.parent.parent.color = self._color
         # Hide the grid view and the number panel if the grid view is empty
-        if len(self.children) == 0:
+        if len(self.children) == 0 and not self._drawn_count:
             self.height = .01
             self.parent.children[-1].height = .01
 
 
-class NewCell(object):
+class TextureCache(object):
+    """
+    LRU cache of rendered text textures, shared by the cells, the number
+    labels and the drawn cells of all tables (texture_cache). Textures are
+    evicted, the least recently used first, when they take more than
+    budget bytes.
+    Example: texture_cache.budget = 64 * 1024 * 1024
+    """
+
+    def __init__(self, budget=32 * 1024 * 1024):
+        self._budget = budget
+        # key: (texture, core label rendering it), the last used at the end
+        self._textures = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @ property
+    def budget(self):
+        """ Get/set the memory budget in bytes """
+        return self._budget
+
+    @ budget.setter
+    def budget(self, budget):
+        self._budget = budget
+        self._evict()
+
+    @ property
+    def size(self):
+        """ Bytes taken by the cached textures """
+        return self._bytes
+
+    def __len__(self):
+        return len(self._textures)
+
+    @ staticmethod
+    def key(text, options):
+        """ Cache key of a text rendered with core label options """
+        return (text,) + tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in options.items()))
+
+    @ staticmethod
+    def _texture_bytes(texture):
+        width, height = texture.size
+        return width * height * 4
+
+    def get(self, key):
+        """ Cached texture of a key, None if it isn't cached """
+        entry = self._textures.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._textures.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, texture, label):
+        """
+        Cache a texture rendered by a core label. The label is kept with
+        it: it fills the texture when it's first drawn and again after the
+        GL context is reloaded, so it must not render other texts.
+        """
+        old = self._textures.pop(key, None)
+        if old is not None:
+            self._bytes -= self._texture_bytes(old[0])
+        self._textures[key] = (texture, label)
+        self._bytes += self._texture_bytes(texture)
+        self._evict()
+
+    def _evict(self):
+        """ Drop the least recently used textures over the budget """
+        while self._bytes > self._budget and self._textures:
+            texture = self._textures.popitem(last=False)[1][0]
+            self._bytes -= self._texture_bytes(texture)
+            self.evictions += 1
+
+    def clear(self):
+        """ Drop all the textures and reset the counters """
+        self._textures.clear()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """ Counters and memory use as a dict """
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'textures': len(self),
+                'bytes': self._bytes, 'budget': self._budget}
+
+
+texture_cache = TextureCache()
+
+
+class SharedTextureLabel(object):
+    """ Label widget taking its text textures from texture_cache """
+
+    def texture_update(self, *largs):
+        """ Render the text, or take the texture of the same text """
+        label = self._label
+        if self.markup or label.options.get('shorten') or \
+                not label.text.strip():
+            super(SharedTextureLabel, self).texture_update(*largs)
+            return
+        options = dict(label.options)
+        # options keep the first text and text_size, the current text_size
+        # (CellButton: the cell size) is the usersize
+        del options['text']
+        options['text_size'] = tuple(label.usersize)
+        key = TextureCache.key(label.text, options)
+        texture = texture_cache.get(key)
+        if texture is None:
+            # a core label of its own, the widget's one renders other texts
+            core = label.__class__(text=label.text, **options)
+            core.refresh()
+            texture = core.texture
+            if texture is None:
+                super(SharedTextureLabel, self).texture_update(*largs)
+                return
+            texture_cache.put(key, texture, core)
+        self.texture = texture
+        self.texture_size = list(texture.size)
+        self.is_shortened = False
+
+
+class NewCell(SharedTextureLabel):
     """Grid/button element for table"""
 
+    # Cell classes composed with NewCell, by cell widget type
+    _cell_classes = {}
+
+    @ classmethod
+    def cell_class(cls, cell_type):
+        """ Get the cell class for a widget type, it's created only once """
+        cell_class = cls._cell_classes.get(cell_type)
+        if cell_class is None:
+            cell_class = type('Cell', (cls, cell_type), {})
+            cls._cell_classes[cell_type] = cell_class
+        return cell_class
+
+    @ classmethod
+    def register_types(cls, *cell_types):
+        """
+        Create the cell classes and apply their kv rules once,
+        so it isn't done when the first row is added.
+        Example: NewCell.register_types(Button, TextInput, CellButton)
+        """
+        for cell_type in cell_types:
+            cls.cell_class(cell_type)()
+
     def __init__(self, **kwargs):
         super(NewCell, self).__init__(**kwargs)
-        self.bind(size=self._redraw_widget)
+        self.bind(height=self._redraw_widget)
         self.bind(on_press=self._on_press_button)
         self._color_widget = [1, 1, 1, 1]
         # color when click
         self._color_click = [0.8, 0.8, 0.8, 1]
         self._cell_type = Button
         self._sort_key = None
+        # Row and column of the cell, kept up to date by GridTable
+        self._row = 0
+        self._col = 0
+        # Pooled widget of a virtual table
+        self._pooled = False
+        # Painted with the selection color
+        self._selected = False
+        self._attrs = {}
+        if self.property('text', quiet=True):
+            self.fbind('text', self._on_text)
 
     def _background_color(self, value):
         """ Set the background color """
@@ -796,6 +2513,16 @@ class NewCell(object):
     def cell_type(self, value):
         self._cell_type = value
 
+    @ property
+    def row(self):
+        """ row index of the cell """
+        return self._row
+
+    @ property
+    def col(self):
+        """ column index of the cell """
+        return self._col
+
     @ property
     def sort_key(self):
         """ sort key """
@@ -821,20 +2548,1637 @@ class NewCell(object):
         # print('pressed on grid item')
         self.main_table = self.parent.parent.parent.parent
         self.grid = self.parent
-        self.main_table.choose_row(self.grid._get_row_index(self))
+        self.main_table._click_row(self.grid._get_row_index(self))
+
+    def _on_text(self, instance, text):
+        """ Pass edited text to the table model """
+        if isinstance(self.parent, GridTable):
+            self.parent._on_cell_text(self, text)
 
     def _redraw_widget(self, *args):
         """ Method of redraw this widget """
         # Editting a height of number label in this row
-        if not self.parent:
+        if isinstance(self.parent, GridTable) and not self._pooled:
+            self.parent._on_cell_height(self)
+
+
+class TableColumn(object):
+    """
+    Column of the table model.
+    Texts are parsed with the column sort_key once, when the row is added,
+    float and int values are kept in arrays.
+    """
+
+    def __init__(self, sort_key=None):
+        self.sort_key = sort_key
+        if sort_key is float:
+            self.kind = 'float'
+            self.values = array('d')
+        elif sort_key is int:
+            self.kind = 'int'
+            self.values = array('q')
+        elif sort_key:
+            self.kind = 'key'
+            self.values = []
+        else:
+            self.kind = 'str'
+            self.values = None
+        self.texts = []
+        self.cell_types = []
+        self.attrs = []
+        # 0 where sort_key could not parse the text
+        self.valid = bytearray()
+        self.invalid_count = 0
+        # Row ids sorted by the column, rev: ids, until the column changes
+        # or the rows are reordered by another column
+        self._order = None
+
+    def _parse(self, text):
+        """ Typed value of the text and whether it was parsed """
+        try:
+            value = self.sort_key(text)
+            if self.kind == 'int' and not -2 ** 63 <= value < 2 ** 63:
+                raise OverflowError
+            return value, True
+        except Exception:
+            return (0 if self.kind == 'int' else
+                    0.0 if self.kind == 'float' else None), False
+
+    def append(self, cell_type, kwargs):
+        """ Add the cell of a new row """
+        text = kwargs.get('text', '')
+        self._order = None
+        self.texts.append(text)
+        if self.values is not None:
+            value, ok = self._parse(text)
+            self.values.append(value)
+            self.valid.append(ok)
+            self.invalid_count += not ok
+        self.cell_types.append(cell_type)
+        attrs = dict((key, value) for key, value in kwargs.items()
+                     if key not in ('text', 'sort_key'))
+        # rows with the same attributes share one dict
+        if self.attrs and self.attrs[-1] == attrs:
+            attrs = self.attrs[-1]
+        self.attrs.append(attrs)
+
+    def delete(self, row_num):
+        """ Delete the cell of a row """
+        self._order = None
+        del self.texts[row_num]
+        if self.values is not None:
+            del self.values[row_num]
+            self.invalid_count -= not self.valid[row_num]
+            del self.valid[row_num]
+        del self.cell_types[row_num]
+        del self.attrs[row_num]
+
+    def rows_deleted(self):
+        """ Update the cached order and counts after permute dropped rows """
+        self._order = None
+        if self.values is not None:
+            self.invalid_count = len(self.valid) - self.valid.count(1)
+
+    def set_text(self, row_num, text):
+        """ Change the text of a cell """
+        if self.texts[row_num] == text:
+            return
+        self._order = None
+        self.texts[row_num] = text
+        if self.values is not None:
+            value, ok = self._parse(text)
+            self.values[row_num] = value
+            self.invalid_count += self.valid[row_num] - ok
+            self.valid[row_num] = ok
+
+    def set_attr(self, row_num, name, value):
+        """ Change an attribute of a cell """
+        attrs = dict(self.attrs[row_num])
+        attrs[name] = value
+        self.attrs[row_num] = attrs
+
+    def numpy_values(self):
+        """ NumPy view of a float/int column, None without NumPy """
+        if numpy is None or self.kind not in ('float', 'int') or \
+                not self.texts:
+            return None
+        return numpy.frombuffer(self.values, dtype=self.values.typecode)
+
+    def numpy_valid(self):
+        """ NumPy bool mask of the parsed cells """
+        return numpy.frombuffer(self.valid, dtype=numpy.uint8).astype(bool)
+
+    def sort_values(self):
+        """
+        Values to sort by. Texts sort_key couldn't parse go after the
+        parsed values (ascending), ordered by text.
+        """
+        if self.values is None:
+            return self.texts
+        if not self.invalid_count:
+            return self.values
+        return [(0, value) if ok else (1, text) for value, ok, text
+                in zip(self.values, self.valid, self.texts)]
+
+    def sort_value(self, row_num):
+        """ Value of a row to sort by, ordered like sort_values """
+        if self.values is None:
+            return self.texts[row_num]
+        if self.valid[row_num]:
+            return (0, self.values[row_num])
+        return (1, self.texts[row_num])
+
+    def permute(self, perm, index=None):
+        """
+        Reorder the cells, perm[new row] is the old row.
+        index is perm as a NumPy array, when NumPy is available.
+        """
+        self.texts = self._take(self.texts, perm, index)
+        values = self.numpy_values()
+        if values is not None:
+            self.values = array(self.values.typecode,
+                                values[index].tobytes())
+            self.valid = bytearray(numpy.frombuffer(
+                self.valid, dtype=numpy.uint8)[index].tobytes())
+        elif self.values is not None:
+            if self.kind == 'key':
+                self.values = [self.values[i] for i in perm]
+            else:
+                self.values = array(self.values.typecode,
+                                    (self.values[i] for i in perm))
+            self.valid = bytearray(self.valid[i] for i in perm)
+        self.cell_types = self._take(self.cell_types, perm, index)
+        self.attrs = self._take(self.attrs, perm, index)
+
+    @ staticmethod
+    def _take(items, perm, index):
+        """ List items reordered by perm """
+        # cell types and attributes are often the same for the whole column
+        if items and items.count(items[0]) == len(items):
+            return items if len(perm) == len(items) else items[:len(perm)]
+        if index is not None:
+            objects = numpy.empty(len(items), dtype=object)
+            objects[:] = items
+            return objects[index].tolist()
+        return [items[i] for i in perm]
+
+
+def _cell_font(attrs):
+    """ (font_name, font_size) of a cell from its attributes """
+    font_size = attrs.get('font_size')
+    if not isinstance(font_size, (int, float)):
+        font_size = sp(15)
+    return attrs.get('font_name', DEFAULT_FONT), font_size
+
+
+def _parse_number(text):
+    """ Text as a float, None when it isn't a number """
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+class TableModel(object):
+    """ Table data stored by column, independent of the widgets """
+
+    # rows tested with NumPy from this many rows, fewer are looped over
+    numpy_min_rows = 64
+
+    def __init__(self):
+        self._columns = []
+        self._row_count = 0
+        # Stable row ids, in row order
+        self._ids = array('q')
+        self._next_id = 0
+        # Row number of each row id, built when needed
+        self._positions = None
+        # Prefix indexes of the searched columns
+        self._indexes = {}
+        # Text widths of the auto width columns, column number: ColumnWidths
+        self._widths = {}
+        # Filter (column number: CellFilter) and rows it shows, 1 per row
+        self._filters = {}
+        self._shown = None
+        self._shown_rows = None
+        self._selection = RowSelection()
+        # Last perm of a single column sort_order and its column, reordering
+        # by it keeps the cached order of that column
+        self._column_perm = None
+
+    @ property
+    def columns(self):
+        """ List of TableColumn """
+        return self._columns
+
+    @ property
+    def row_count(self):
+        """ Number of rows """
+        return self._row_count
+
+    @ property
+    def filters(self):
+        """ Current filter, column number: CellFilter """
+        return self._filters
+
+    @ property
+    def selection(self):
+        """ Selected rows, a RowSelection """
+        return self._selection
+
+    @ property
+    def shown_rows(self):
+        """ Row numbers the filter shows, ascending """
+        if self._shown is None:
+            return range(self._row_count)
+        if self._shown_rows is None:
+            if numpy is not None:
+                self._shown_rows = numpy.flatnonzero(numpy.frombuffer(
+                    self._shown, dtype=numpy.uint8)).tolist()
+            else:
+                self._shown_rows = [row_num for row_num, shown
+                                    in enumerate(self._shown) if shown]
+        return self._shown_rows
+
+    def is_shown(self, row_num):
+        """ Whether the filter shows a row """
+        return self._shown is None or bool(self._shown[row_num])
+
+    def shown_position(self, row_num):
+        """ Position of a row among the shown rows, None if it's hidden """
+        rows = self.shown_rows
+        position = bisect_left(rows, row_num)
+        if position < len(rows) and rows[position] == row_num:
+            return position
+        return None
+
+    def set_filter(self, filters=None):
+        """
+        Show only the rows matching all the filters, a dict of
+        column number: CellFilter (or a value for CellFilter.make).
+        When the new filter narrows the current one, only the shown rows
+        are tested, and only with the column filters that changed.
+        """
+        filters = dict((col, CellFilter.make(value))
+                       for col, value in (filters or {}).items())
+        old = self._filters
+        self._filters = filters
+        if not filters:
+            self._shown = None
+            self._shown_rows = None
             return
-        for num, line in enumerate(self.parent.cells):
-            for cell in line:
-                if cell == self:
-                    self.parent.parent.children[1].children[-(
-                        num + 1)].height = self.height
-                    break
+        if self._shown is not None and all(
+                col in filters and filters[col].narrows(old[col])
+                for col in old):
+            rows = self.shown_rows
+            tests = [(col, cell_filter) for col, cell_filter
+                     in filters.items() if col not in old or
+                     not old[col].narrows(cell_filter)]
+        else:
+            rows = range(self._row_count)
+            tests = list(filters.items())
+        # cheap (vectorized) filters first, they leave less rows to test
+        tests.sort(key=lambda test: test[1].cost)
+        for col, cell_filter in tests:
+            # also before the first row, which creates the columns
+            if not rows:
                 break
+            rows = cell_filter.match_rows(self, col, rows)
+        self._shown = bytearray(self._row_count)
+        for row_num in rows:
+            self._shown[row_num] = 1
+        self._shown_rows = list(rows)
+
+    def _match(self, row_num):
+        """ Whether a row matches the filter """
+        return all(cell_filter.match_rows(self, col, [row_num])
+                   for col, cell_filter in self._filters.items())
+
+    def _numpy_rows(self, rows):
+        """ Row numbers as a NumPy index """
+        if isinstance(rows, range):
+            return numpy.arange(rows.start, rows.stop, dtype=numpy.intp)
+        return numpy.asarray(rows, dtype=numpy.intp)
+
+    def append_row(self, items):
+        """
+        Add a row.
+        Example: append_row([[Button, {'text': 'text'}], [TextInput, {}]])
+        """
+        if not self._columns:
+            self._columns = [TableColumn(item[1].get('sort_key'))
+                             for item in items]
+        for column, item in zip(self._columns, items):
+            column.append(item[0], item[1])
+        for col, index in self._indexes.items():
+            index.add(self._columns[col].texts[-1], self._next_id)
+        for col, widths in self._widths.items():
+            column = self._columns[col]
+            widths.add(column.texts[-1], column.attrs[-1])
+        if self._positions is not None:
+            self._positions.append(self._row_count)
+        self._ids.append(self._next_id)
+        self._next_id += 1
+        self._row_count += 1
+        self._selection.append()
+        if self._shown is not None:
+            row_num = self._row_count - 1
+            shown = self._match(row_num)
+            self._shown.append(shown)
+            if shown and self._shown_rows is not None:
+                self._shown_rows.append(row_num)
+
+    def delete_row(self, row_num):
+        """ Delete a row by number """
+        for col, index in self._indexes.items():
+            index.remove(self._columns[col].texts[row_num],
+                         self._ids[row_num])
+        for col, widths in self._widths.items():
+            column = self._columns[col]
+            widths.remove(column.texts[row_num], column.attrs[row_num])
+        for column in self._columns:
+            column.delete(row_num)
+        del self._ids[row_num]
+        self._positions = None
+        self._row_count -= 1
+        self._selection.delete(row_num)
+        if self._shown is not None:
+            del self._shown[row_num]
+            self._shown_rows = None
+
+    def delete_rows(self, rows):
+        """ Delete rows by number, ascending, in one pass """
+        for col, index in self._indexes.items():
+            texts = self._columns[col].texts
+            index.remove_many((texts[row_num], self._ids[row_num])
+                              for row_num in rows)
+        for col, widths in self._widths.items():
+            column = self._columns[col]
+            for row_num in rows:
+                widths.remove(column.texts[row_num], column.attrs[row_num])
+        deleted = bytearray(self._row_count)
+        for row_num in rows:
+            deleted[row_num] = 1
+        if numpy is not None:
+            keep = numpy.flatnonzero(numpy.frombuffer(
+                deleted, dtype=numpy.uint8) == 0)
+        else:
+            keep = [row_num for row_num, dead in enumerate(deleted)
+                    if not dead]
+        # the kept rows in the same order
+        self.permute(keep)
+        for column in self._columns:
+            column.rows_deleted()
+        self._row_count = len(keep)
+
+    def set_text(self, row_num, col, text):
+        """ Change the text of a cell """
+        index = self._indexes.get(col)
+        if index is not None:
+            index.remove(self._columns[col].texts[row_num],
+                         self._ids[row_num])
+            index.add(text, self._ids[row_num])
+        widths = self._widths.get(col)
+        if widths is not None:
+            attrs = self._columns[col].attrs[row_num]
+            widths.remove(self._columns[col].texts[row_num], attrs)
+            widths.add(text, attrs)
+        self._columns[col].set_text(row_num, text)
+        if self._shown is not None and col in self._filters:
+            shown = self._match(row_num)
+            if shown != self._shown[row_num]:
+                self._shown[row_num] = shown
+                if self._shown_rows is not None:
+                    position = bisect_left(self._shown_rows, row_num)
+                    if shown:
+                        self._shown_rows.insert(position, row_num)
+                    else:
+                        del self._shown_rows[position]
+
+    def set_attr(self, row_num, col, name, value):
+        """ Change an attribute of a cell """
+        column = self._columns[col]
+        widths = self._widths.get(col)
+        if widths is not None:
+            widths.remove(column.texts[row_num], column.attrs[row_num])
+        column.set_attr(row_num, name, value)
+        if widths is not None:
+            widths.add(column.texts[row_num], column.attrs[row_num])
+
+    def row_texts(self, row_num):
+        """ Texts of a row """
+        return [column.texts[row_num] for column in self._columns]
+
+    def column_width(self, col, measure, font):
+        """
+        Width of the widest text of a column, measure(text, *font(attrs))
+        measures a text in the font of the cell attributes attrs. The widths
+        are kept up to date from then on.
+        """
+        widths = self._widths.get(col)
+        if widths is None or widths.font != font:
+            column = self._columns[col]
+            widths = ColumnWidths(column.texts, column.attrs,
+                                  lambda text, font_: measure(text, *font_),
+                                  font)
+            self._widths[col] = widths
+        return widths.max_width
+
+    def row_id(self, row_num):
+        """ Stable id of a row, it doesn't change when rows move """
+        return self._ids[row_num]
+
+    def find_row(self, row_id):
+        """ Row number of a row id """
+        if self._positions is None:
+            if numpy is not None:
+                positions = numpy.zeros(self._next_id, dtype=numpy.int64)
+                positions[numpy.frombuffer(self._ids, dtype=numpy.int64)] = \
+                    numpy.arange(self._row_count)
+                self._positions = array('q', positions.tobytes())
+            else:
+                self._positions = array('q', bytes(8 * self._next_id))
+                for row_num, row_id_ in enumerate(self._ids):
+                    self._positions[row_id_] = row_num
+        return self._positions[row_id]
+
+    def find_prefix(self, col, prefix, after=None, rev=False):
+        """
+        Row number of the first shown row whose text in col starts with
+        prefix (ignoring case), in the order of the column texts, reversed
+        with rev. With after (a row number), the match following that row,
+        wrapping around. None if nothing matches.
+        """
+        index = self._indexes.get(col)
+        if index is None:
+            index = PrefixIndex(self._columns[col].texts, self._ids)
+            self._indexes[col] = index
+        keys = index.keys()
+        prefix = prefix.lower()
+        low = bisect_left(keys, (prefix,))
+        high = bisect_left(keys, (prefix + '\U0010ffff',))
+        after_key = None
+        if after is not None:
+            after_key = (self._columns[col].texts[after].lower(),
+                         self._ids[after])
+        if rev:
+            start = high if after_key is None else \
+                bisect_left(keys, after_key)
+            key_nums = chain(range(min(start, high) - 1, low - 1, -1),
+                             range(high - 1, max(start, low) - 1, -1))
+        else:
+            start = low if after_key is None else \
+                bisect_right(keys, after_key)
+            key_nums = chain(range(max(start, low), high),
+                             range(low, min(start, high)))
+        for key_num in key_nums:
+            row_num = self.find_row(keys[key_num][1])
+            if self.is_shown(row_num):
+                return row_num
+        return None
+
+    def column_range(self, col):
+        """ (min, max) of the parsed values of a column, None if empty """
+        column = self._columns[col]
+        values = column.numpy_values()
+        if values is not None:
+            if column.invalid_count:
+                values = values[column.numpy_valid()]
+            if not len(values):
+                return None
+            return values.min().item(), values.max().item()
+        values = column.texts if column.values is None else \
+            [value for value, ok in zip(column.values, column.valid) if ok]
+        if not values:
+            return None
+        return min(values), max(values)
+
+    def rows_in_range(self, col, low=None, high=None, rows=None):
+        """
+        Row numbers whose parsed value is in low..high (inclusive),
+        None means no limit. Cells that weren't parsed never match.
+        Texts bounds are compared with the cell texts, number bounds on a
+        column without sort_key with the texts parsed by float.
+        rows limits the rows to test, ascending row numbers.
+        """
+        column = self._columns[col]
+        if rows is None:
+            rows = range(self._row_count)
+        if isinstance(low, str) or isinstance(high, str):
+            values, valid = column.texts, None
+        elif column.values is None:
+            numbers = ((row_num, _parse_number(column.texts[row_num]))
+                       for row_num in rows)
+            return [row_num for row_num, value in numbers
+                    if value is not None and
+                    (low is None or value >= low) and
+                    (high is None or value <= high)]
+        else:
+            values = column.numpy_values()
+            # a few rows (a new or edited row) are tested without copies
+            if values is not None and len(rows) >= self.numpy_min_rows:
+                index = self._numpy_rows(rows)
+                values = values[index]
+                mask = numpy.frombuffer(column.valid,
+                                        dtype=numpy.uint8)[index] != 0
+                if low is not None:
+                    mask &= values >= low
+                if high is not None:
+                    mask &= values <= high
+                return index[mask].tolist()
+            values, valid = column.values, column.valid
+        return [row_num for row_num in rows
+                if (valid is None or valid[row_num]) and
+                (low is None or values[row_num] >= low) and
+                (high is None or values[row_num] <= high)]
+
+    def sort_order(self, keys):
+        """
+        Row order for sort keys, a list of (col, rev) where the first key
+        sorts first. Returns perm, perm[new row] is the old row, as a
+        NumPy array when NumPy is used. Multi-column sorts are stable.
+        The order of a single column is cached until the column changes or
+        the rows are reordered another way, sorting it again or the other
+        way round reuses it.
+        """
+        if len(keys) == 1:
+            col, rev = keys[0]
+            ids = self._column_order(col, rev)
+            if numpy is not None:
+                ids = numpy.frombuffer(ids, dtype=numpy.int64)
+                positions = numpy.empty(self._next_id, dtype=numpy.int64)
+                positions[numpy.frombuffer(self._ids, dtype=numpy.int64)] = \
+                    numpy.arange(self._row_count)
+                perm = positions[ids]
+            else:
+                positions = array('q', bytes(8 * self._next_id))
+                for row_num, row_id in enumerate(self._ids):
+                    positions[row_id] = row_num
+                perm = [positions[row_id] for row_id in ids]
+            self._column_perm = (perm, col)
+            return perm
+        columns = [self._columns[col] for col, rev in keys]
+        if all(column.numpy_values() is not None and
+               not column.invalid_count for column in columns):
+            # lexsort sorts by the last key first, stable
+            return numpy.lexsort([
+                -column.numpy_values() if rev else column.numpy_values()
+                for column, (col, rev) in zip(columns[::-1], keys[::-1])
+            ])
+        order = list(range(self._row_count))
+        for col, rev in reversed(keys):
+            values = self._columns[col].sort_values()
+            order.sort(key=values.__getitem__, reverse=rev)
+        return order
+
+    def _column_order(self, col, rev=False):
+        """
+        Row ids sorted by a column, equal values in their row order (also
+        when rev). Cached, the order of equal values is the one of the rows
+        when it was built.
+        """
+        column = self._columns[col]
+        if column._order is None:
+            column._order = {}
+        if rev not in column._order:
+            column._order[rev] = self._sorted_ids(column, rev)
+        return column._order[rev]
+
+    def _sorted_ids(self, column, rev):
+        """ Row ids sorted by a column, a stable sort """
+        values = column.numpy_values()
+        if values is not None:
+            if column.invalid_count:
+                valid = numpy.frombuffer(column.valid, dtype=numpy.uint8) != 0
+                rows = numpy.flatnonzero(valid)
+                order = rows[self._numpy_argsort(values[rows], rev)]
+                # not parsed texts after the values, before when rev
+                texts = column.texts
+                rest = numpy.array(sorted(numpy.flatnonzero(~valid).tolist(),
+                                          key=texts.__getitem__, reverse=rev),
+                                   dtype=order.dtype)
+                order = numpy.concatenate([rest, order] if rev
+                                          else [order, rest])
+            else:
+                order = self._numpy_argsort(values, rev)
+            ids = numpy.frombuffer(self._ids, dtype=numpy.int64)[order]
+            return array('q', ids.tobytes())
+        values = column.sort_values()
+        order = sorted(range(self._row_count), key=values.__getitem__,
+                       reverse=rev)
+        return array('q', (self._ids[i] for i in order))
+
+    @ staticmethod
+    def _numpy_argsort(values, rev):
+        """ Stable argsort, equal values keep their order when rev too """
+        if not rev:
+            return numpy.argsort(values, kind='stable')
+        # sorting the reversed values reverses the order of equal values
+        order = numpy.argsort(values[::-1], kind='stable')
+        return (len(values) - 1 - order)[::-1]
+
+    def _sort_row_key(self, row_num, keys):
+        """ Values of a row for sort keys """
+        return [self._columns[col].sort_value(row_num) for col, rev in keys]
+
+    @ staticmethod
+    def _sorts_before(key, other, keys):
+        """ Whether a row key sorts before another one """
+        for value, other_value, (col, rev) in zip(key, other, keys):
+            if value != other_value:
+                return value > other_value if rev else value < other_value
+        return False
+
+    def resort(self, rows, keys):
+        """
+        Order after cells of rows changed in a table sorted by keys, the
+        other rows are still in order. The changed rows are put back in
+        their place by binary search, no sort is done. Returns perm like
+        sort_order, None if the rows are still in order.
+        """
+        rows = sorted(set(rows))
+        count = self._row_count
+        keyed = dict((row_num, self._sort_row_key(row_num, keys))
+                     for row_num in rows)
+
+        def in_place(row_num):
+            key = keyed[row_num]
+            return not (
+                row_num > 0 and self._sorts_before(
+                    key, self._sort_row_key(row_num - 1, keys), keys) or
+                row_num + 1 < count and self._sorts_before(
+                    self._sort_row_key(row_num + 1, keys), key, keys))
+
+        if all(in_place(row_num) for row_num in rows):
+            return None
+        moved = set(rows)
+        order = [row_num for row_num in range(count)
+                 if row_num not in moved]
+        for row_num in rows:
+            key = keyed[row_num]
+            low, high = 0, len(order)
+            while low < high:
+                middle = (low + high) // 2
+                if self._sorts_before(
+                        key, self._sort_row_key(order[middle], keys), keys):
+                    high = middle
+                else:
+                    low = middle + 1
+            order.insert(low, row_num)
+        return order
+
+    def permute(self, perm):
+        """ Reorder the rows, perm[new row] is the old row """
+        index = None
+        if numpy is not None:
+            index = numpy.asarray(perm, dtype=numpy.intp)
+        # equal values of a column keep their row order only when sorted by
+        # that column, the other cached orders are outdated
+        sorted_col = None
+        if self._column_perm is not None and self._column_perm[0] is perm:
+            sorted_col = self._column_perm[1]
+        self._column_perm = None
+        for col, column in enumerate(self._columns):
+            column.permute(perm, index)
+            if col != sorted_col:
+                column._order = None
+        if index is not None:
+            self._ids = array('q', numpy.frombuffer(
+                self._ids, dtype=numpy.int64)[index].tobytes())
+        else:
+            self._ids = array('q', (self._ids[i] for i in perm))
+        self._positions = None
+        self._selection.permute(perm, index)
+        if self._shown is not None:
+            if index is not None:
+                self._shown = bytearray(numpy.frombuffer(
+                    self._shown, dtype=numpy.uint8)[index].tobytes())
+            else:
+                self._shown = bytearray(self._shown[i] for i in perm)
+            self._shown_rows = None
+
+
+class SqliteModel(object):
+    """
+    Table model on a table of a SQLite database, for data too big for the
+    memory. Only a window of rows around the asked row is read at once,
+    sorting is an ORDER BY and filters are a WHERE of the query. The sorted
+    or filtered order is kept as row ids in a temporary table.
+    Use it with a virtual table:
+        table.virtual = True
+        table.set_model(SqliteModel('data.db', 'items', sort_keys=[float]))
+    Changes are written to the database with commit().
+    """
+
+    # rows read at once, the view and a margin around it
+    window_size = 200
+
+    def __init__(self, database, table, columns=None, cell_type=Button,
+                 sort_keys=None):
+        """
+        database is a file name or a sqlite3 connection, columns the
+        column names (all columns of the table by default), sort_keys the
+        sort_key of the columns.
+        """
+        if isinstance(database, sqlite3.Connection):
+            self._conn = database
+        else:
+            self._conn = sqlite3.connect(database)
+        self._table = self._quote(table)
+        if columns is None:
+            columns = [info[1] for info in self._conn.execute(
+                'PRAGMA table_info(%s)' % self._table)]
+        self._names = [self._quote(name) for name in columns]
+        sort_keys = sort_keys or []
+        self._columns = [
+            SqliteColumn(self, col, name, cell_type,
+                         sort_keys[col] if col < len(sort_keys) else None)
+            for col, name in enumerate(columns)]
+        self._view = 'table_view_%d' % id(self)
+        self._has_view = False
+        # rowid is the row number + 1
+        self._dense = False
+        self._stale = True
+        self._row_count = 0
+        self._filters = {}
+        self._sort_keys = []
+        # Attributes set on cells, (row id, column number): dict
+        self._attrs = {}
+        # Selected row numbers, cleared when the query runs again
+        self._selection = RowSelection()
+        # Cached rows, (row id, texts...) from row number _window_start
+        self._window = []
+        self._window_start = 0
+
+    @ staticmethod
+    def _quote(name):
+        """ SQL identifier """
+        return '"%s"' % name.replace('"', '""')
+
+    @ property
+    def columns(self):
+        """ List of SqliteColumn """
+        return self._columns
+
+    @ property
+    def row_count(self):
+        """ Number of rows the filter shows """
+        self._refresh()
+        return self._row_count
+
+    @ property
+    def filters(self):
+        """ Current filter, column number: CellFilter """
+        return self._filters
+
+    @ property
+    def selection(self):
+        """ Selected rows, a RowSelection """
+        self._refresh()
+        return self._selection
+
+    @ property
+    def shown_rows(self):
+        """ Row numbers, the filter is applied by the query """
+        return range(self.row_count)
+
+    def is_shown(self, row_num):
+        """ Whether the filter shows a row, all row numbers are shown """
+        return row_num < self.row_count
+
+    def shown_position(self, row_num):
+        """ Position of a row among the shown rows """
+        return row_num if row_num < self.row_count else None
+
+    def set_filter(self, filters=None):
+        """
+        Show only the rows matching all the filters, a dict of
+        column number: CellFilter (or a value for CellFilter.make).
+        The filters become the WHERE of the query, a FilterCallable is
+        called by SQLite.
+        """
+        self._filters = dict((col, CellFilter.make(value))
+                             for col, value in (filters or {}).items())
+        self._stale = True
+
+    def _where(self):
+        """ WHERE of the filter and its parameters """
+        clauses = []
+        params = []
+        for col, cell_filter in sorted(self._filters.items()):
+            name = self._names[col]
+            sql = cell_filter.sql(name)
+            if sql is None and isinstance(cell_filter, FilterCallable):
+                func_name = 'table_filter_%d_%d' % (id(self), col)
+                self._conn.create_function(
+                    func_name, 1, lambda value, func=cell_filter.func:
+                    bool(func(self._text(value))))
+                sql = ('%s(%s)' % (func_name, name), [])
+            if sql is None:
+                print('ERROR: %s can\'t filter a SQLite table' %
+                      type(cell_filter).__name__)
+                continue
+            clauses.append(sql[0])
+            params.extend(sql[1])
+        if not clauses:
+            return '', []
+        return ' WHERE ' + ' AND '.join(clauses), params
+
+    def _order_by(self):
+        """ ORDER BY of the sort keys """
+        if not self._sort_keys:
+            return ''
+        keys = []
+        for col, rev in self._sort_keys:
+            key = self._names[col]
+            if self._columns[col].sort_key in (int, float):
+                key = 'CAST(%s AS REAL)' % key
+            keys.append(key + (' DESC' if rev else ''))
+        # rowid keeps the sort stable
+        return ' ORDER BY %s, rowid' % ', '.join(keys)
+
+    def _refresh(self):
+        """ Run the query again after a change of the filter or the sort """
+        if not self._stale:
+            return
+        self._stale = False
+        self._window = []
+        self._conn.execute('DROP TABLE IF EXISTS temp.%s' % self._view)
+        where, params = self._where()
+        order_by = self._order_by()
+        self._has_view = bool(where or order_by)
+        if self._has_view:
+            self._conn.execute(
+                'CREATE TEMP TABLE %s (row_id INTEGER)' % self._view)
+            self._conn.execute(
+                'INSERT INTO temp.%s (row_id) SELECT rowid FROM %s%s%s' %
+                (self._view, self._table, where, order_by), params)
+            # find_row looks up row ids, built once the rows are in
+            self._conn.execute('CREATE INDEX temp.%s_row_id ON %s (row_id)'
+                               % (self._view, self._view))
+            self._row_count, = self._conn.execute(
+                'SELECT count(*) FROM temp.%s' % self._view).fetchone()
+            self._dense = False
+        else:
+            self._row_count, low, high = self._conn.execute(
+                'SELECT count(*), min(rowid), max(rowid) FROM %s' %
+                self._table).fetchone()
+            self._dense = low == 1 and high == self._row_count
+        self._selection = RowSelection(self._row_count)
+
+    @ staticmethod
+    def _text(value):
+        """ Cell text of a database value """
+        return '' if value is None else str(value)
+
+    def _row(self, row_num):
+        """ (row id, texts...) of a row, read with its window """
+        self._refresh()
+        index = row_num - self._window_start
+        if 0 <= index < len(self._window):
+            return self._window[index]
+        if not 0 <= row_num < self._row_count:
+            raise IndexError('row index out of range')
+        # the window starts a bit before the row, for scrolling up
+        start = max(row_num - self.window_size // 4, 0)
+        names = ', '.join('t.' + name for name in self._names)
+        if self._has_view:
+            rows = self._conn.execute(
+                'SELECT t.rowid, %s FROM temp.%s AS v JOIN %s AS t '
+                'ON t.rowid = v.row_id WHERE v.rowid > ? AND v.rowid <= ? '
+                'ORDER BY v.rowid' % (names, self._view, self._table),
+                (start, start + self.window_size))
+        elif self._dense:
+            rows = self._conn.execute(
+                'SELECT t.rowid, %s FROM %s AS t '
+                'WHERE t.rowid > ? AND t.rowid <= ? ORDER BY t.rowid' %
+                (names, self._table), (start, start + self.window_size))
+        else:
+            rows = self._conn.execute(
+                'SELECT t.rowid, %s FROM %s AS t ORDER BY t.rowid '
+                'LIMIT ? OFFSET ?' % (names, self._table),
+                (self.window_size, start))
+        self._window = [(row[0],) + tuple(self._text(value)
+                                          for value in row[1:])
+                        for row in rows]
+        self._window_start = start
+        return self._window[row_num - start]
+
+    def append_row(self, items):
+        """
+        Add a row, at the end until the next sort or filter.
+        Example: append_row([[Button, {'text': 'text'}], [TextInput, {}]])
+        """
+        self._refresh()
+        cursor = self._conn.execute(
+            'INSERT INTO %s (%s) VALUES (%s)' %
+            (self._table, ', '.join(self._names),
+             ', '.join('?' * len(self._names))),
+            [item[1].get('text', '') for item in items])
+        if self._has_view:
+            self._conn.execute('INSERT INTO temp.%s (row_id) VALUES (?)' %
+                               self._view, (cursor.lastrowid,))
+        self._dense = self._dense and \
+            cursor.lastrowid == self._row_count + 1
+        self._row_count += 1
+        self._selection.append()
+        for col, item in enumerate(items):
+            attrs = dict((key, value) for key, value in item[1].items()
+                         if key not in ('text', 'sort_key'))
+            if attrs:
+                self._attrs[(cursor.lastrowid, col)] = attrs
+        if self._window_start + len(self._window) == self._row_count - 1:
+            self._window = []
+
+    def delete_row(self, row_num):
+        """ Delete a row by number """
+        row_id = self.row_id(row_num)
+        self._conn.execute('DELETE FROM %s WHERE rowid = ?' % self._table,
+                           (row_id,))
+        for col in range(len(self._columns)):
+            self._attrs.pop((row_id, col), None)
+        self._stale = True
+
+    def delete_rows(self, rows):
+        """ Delete rows by number, ascending """
+        row_ids = [self.row_id(row_num) for row_num in rows]
+        self._conn.executemany('DELETE FROM %s WHERE rowid = ?' %
+                               self._table, [(row_id,) for row_id in row_ids])
+        if self._attrs:
+            for row_id in row_ids:
+                for col in range(len(self._columns)):
+                    self._attrs.pop((row_id, col), None)
+        self._stale = True
+
+    def set_text(self, row_num, col, text):
+        """ Change the text of a cell, the row stays in its place """
+        row = self._row(row_num)
+        self._conn.execute('UPDATE %s SET %s = ? WHERE rowid = ?' %
+                           (self._table, self._names[col]), (text, row[0]))
+        self._window[row_num - self._window_start] = \
+            row[:col + 1] + (text,) + row[col + 2:]
+
+    def set_attr(self, row_num, col, name, value):
+        """ Change an attribute of a cell, kept in memory """
+        self._columns[col].set_attr(row_num, name, value)
+
+    def column_width(self, col, measure, font):
+        """
+        Width of the widest text of a column, measure(text, *font(attrs))
+        measures a text in the font of the cell attributes attrs. Only the
+        longest texts are read, they're measured in each font of the column.
+        """
+        name = self._names[col]
+        texts = [self._text(text) for text, in self._conn.execute(
+            'SELECT DISTINCT %s FROM %s ORDER BY length(%s) DESC LIMIT 50' %
+            (name, self._table, name))]
+        fonts = set([font({})])
+        fonts.update(font(attrs) for (row_id, col_), attrs
+                     in self._attrs.items() if col_ == col)
+        return max([measure(text, *font_) for font_ in fonts
+                    for text in texts] or [0])
+
+    def commit(self):
+        """ Write the changes to the database """
+        self._conn.commit()
+
+    def row_texts(self, row_num):
+        """ Texts of a row """
+        return list(self._row(row_num)[1:])
+
+    def row_id(self, row_num):
+        """ Stable id of a row, its SQLite rowid """
+        return self._row(row_num)[0]
+
+    def find_row(self, row_id):
+        """ Row number of a row id, None if the filter hides it """
+        self._refresh()
+        if self._has_view:
+            row = self._conn.execute(
+                'SELECT rowid - 1 FROM temp.%s WHERE row_id = ?' %
+                self._view, (row_id,)).fetchone()
+            return row[0] if row else None
+        if self._dense:
+            return row_id - 1
+        row_num, = self._conn.execute(
+            'SELECT count(*) FROM %s WHERE rowid < ?' % self._table,
+            (row_id,)).fetchone()
+        return row_num
+
+    def find_prefix(self, col, prefix, after=None, rev=False):
+        """
+        Row number of the first shown row whose text in col starts with
+        prefix (ignoring case), in the order of the column texts, reversed
+        with rev. With after (a row number), the match following that row,
+        wrapping around. None if nothing matches.
+        """
+        self._refresh()
+        name = self._names[col]
+        where, params = self._where()
+        sql = 'SELECT rowid FROM %s WHERE %s LIKE ? ESCAPE ?%s' % (
+            self._table, name, where.replace(' WHERE ', ' AND ', 1))
+        params = [prefix.replace('\\', '\\\\').replace('%', '\\%')
+                  .replace('_', '\\_') + '%', '\\'] + params
+        order_by = ' ORDER BY lower(%s)%s, rowid%s LIMIT 1' % (
+            name, ' DESC' if rev else '', ' DESC' if rev else '')
+        row = None
+        if after is not None:
+            # row values compare like tuples
+            row = self._conn.execute(
+                sql + ' AND (lower(%s), rowid) %s (?, ?)' % (
+                    name, '<' if rev else '>') + order_by,
+                params + [self._columns[col].texts[after].lower(),
+                          self.row_id(after)]).fetchone()
+        if row is None:
+            row = self._conn.execute(sql + order_by, params).fetchone()
+        return self.find_row(row[0]) if row else None
+
+    def sort_order(self, keys):
+        """
+        Row order for sort keys, a list of (col, rev) where the first key
+        sorts first. The query does the sort, so the order is just the keys
+        for permute.
+        """
+        return list(keys)
+
+    def permute(self, keys):
+        """ Sort by the keys of sort_order """
+        self._sort_keys = keys
+        self._stale = True
+
+    def resort(self, rows, keys):
+        """ Changed rows stay in their place, like with set_text """
+        return None
+
+
+class SqliteColumn(object):
+    """ Column of a SqliteModel """
+
+    def __init__(self, model, col, name, cell_type, sort_key=None):
+        self.name = name
+        self.sort_key = sort_key
+        self._model = model
+        self._col = col
+        self._cell_type = cell_type
+        self.texts = SqliteColumnView(model, self._text)
+        self.cell_types = SqliteColumnView(model, self._get_cell_type)
+        self.attrs = SqliteColumnView(model, self._get_attrs)
+
+    def _text(self, row_num):
+        return self._model._row(row_num)[self._col + 1]
+
+    def _get_cell_type(self, row_num):
+        return self._cell_type
+
+    def _get_attrs(self, row_num):
+        return self._model._attrs.get(
+            (self._model.row_id(row_num), self._col), {})
+
+    def set_text(self, row_num, text):
+        """ Change the text of a cell """
+        self._model.set_text(row_num, self._col, text)
+
+    def set_attr(self, row_num, name, value):
+        """ Change an attribute of a cell, kept in memory """
+        key = (self._model.row_id(row_num), self._col)
+        attrs = dict(self._model._attrs.get(key, {}))
+        attrs[name] = value
+        self._model._attrs[key] = attrs
+
+
+class SqliteColumnView(object):
+    """ Values of a SqliteColumn by row number, read when asked """
+
+    def __init__(self, model, get):
+        self._model = model
+        self._get = get
+
+    def __len__(self):
+        return self._model.row_count
+
+    def __getitem__(self, row_num):
+        if isinstance(row_num, slice):
+            return [self[i] for i in range(*row_num.indices(len(self)))]
+        if row_num < 0:
+            row_num += len(self)
+        if not 0 <= row_num < len(self):
+            raise IndexError('row index out of range')
+        return self._get(row_num)
+
+    def __iter__(self):
+        for row_num in range(len(self)):
+            yield self._get(row_num)
+
+
+class ColumnWidths(object):
+    """
+    Widths of the texts of a column for the auto width, each in the font
+    of its cell. Each distinct text and font is measured once, the widest
+    one is found again only when it's removed. measure(text, font) measures
+    a text, font(attrs) is the font of the cell attributes attrs.
+    """
+
+    def __init__(self, texts, attrs, measure, font):
+        self.font = font
+        self._measure = measure
+        if attrs and attrs.count(attrs[0]) == len(attrs):
+            # the cells often share one dict of attributes
+            fonts = repeat(font(attrs[0]))
+        else:
+            known = {}
+
+            def cell_font(item):
+                if id(item) not in known:
+                    known[id(item)] = font(item)
+                return known[id(item)]
+            fonts = map(cell_font, attrs)
+        self._counts = Counter(zip(texts, fonts))
+        self._widths = dict((key, measure(*key)) for key in self._counts)
+        self._max = None
+
+    @ property
+    def max_width(self):
+        """ Width of the widest text """
+        if self._max is None:
+            self._max = max(self._widths.values(), default=0)
+        return self._max
+
+    def add(self, text, attrs):
+        """ Add the text of a cell """
+        key = (text, self.font(attrs))
+        if key in self._counts:
+            self._counts[key] += 1
+            return
+        self._counts[key] = 1
+        width = self._widths[key] = self._measure(*key)
+        if self._max is not None and width > self._max:
+            self._max = width
+
+    def remove(self, text, attrs):
+        """ Remove the text of a cell """
+        key = (text, self.font(attrs))
+        self._counts[key] -= 1
+        if self._counts[key]:
+            return
+        del self._counts[key]
+        if self._widths.pop(key) == self._max:
+            self._max = None
+
+
+class RowSelection(object):
+    """
+    Selected rows of a table model, a byte per row. Ranges of rows are set
+    with slice assignments and found with bytearray.find, in C.
+    """
+
+    def __init__(self, size=0):
+        self._bits = bytearray(size)
+
+    def __contains__(self, row_num):
+        return 0 <= row_num < len(self._bits) and bool(self._bits[row_num])
+
+    def count(self):
+        """ Number of selected rows """
+        return self._bits.count(1)
+
+    def ranges(self):
+        """ Iterator of (start, stop) of the selected rows, ascending """
+        bits = self._bits
+        start = bits.find(1)
+        while start != -1:
+            stop = bits.find(0, start)
+            if stop == -1:
+                stop = len(bits)
+            yield start, stop
+            start = bits.find(1, stop)
+
+    def set(self, rows, selected=True):
+        """ Select or unselect rows, a range or ascending row numbers """
+        value = 1 if selected else 0
+        if isinstance(rows, range) and rows.step == 1:
+            self._bits[rows.start:rows.stop] = \
+                bytes([value]) * len(rows)
+        elif numpy is not None and len(rows) > 1:
+            numpy.frombuffer(self._bits, dtype=numpy.uint8)[
+                numpy.asarray(rows, dtype=numpy.intp)] = value
+        else:
+            for row_num in rows:
+                self._bits[row_num] = value
+
+    def toggle(self, row_num):
+        """ Select an unselected row, unselect a selected one """
+        self._bits[row_num] ^= 1
+
+    def clear(self):
+        """ Unselect all rows """
+        self._bits = bytearray(len(self._bits))
+
+    def append(self):
+        """ Add an unselected row """
+        self._bits.append(0)
+
+    def delete(self, row_num):
+        """ Delete a row """
+        del self._bits[row_num]
+
+    def permute(self, perm, index=None):
+        """
+        Reorder the rows, perm[new row] is the old row.
+        index is perm as a NumPy array, when NumPy is available.
+        """
+        if index is not None:
+            self._bits = bytearray(numpy.frombuffer(
+                self._bits, dtype=numpy.uint8)[index].tobytes())
+        else:
+            self._bits = bytearray(self._bits[i] for i in perm)
+
+
+class PrefixIndex(object):
+    """
+    Sorted (lower case text, row id) keys of a column for the type-ahead
+    search. Row ids don't change when rows move, so sorting keeps it valid.
+    Keys are inserted and removed with bisect when the cells change, past
+    max_inserts keys added between two searches (adding many rows) the
+    others are sorted in on the next search.
+    """
+
+    # keys inserted one by one between two searches
+    max_inserts = 1000
+
+    def __init__(self, texts, ids):
+        self._keys = sorted(zip((text.lower() for text in texts), ids))
+        self._inserts = 0
+        # keys added past max_inserts, not in _keys yet
+        self._added = []
+
+    def add(self, text, row_id):
+        """ Add the key of a cell """
+        key = (text.lower(), row_id)
+        if self._inserts < self.max_inserts:
+            self._inserts += 1
+            insort(self._keys, key)
+        else:
+            self._added.append(key)
+
+    def remove(self, text, row_id):
+        """ Remove the key of a cell """
+        key = (text.lower(), row_id)
+        keys = self._keys
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+        else:
+            self._added.remove(key)
+
+    def remove_many(self, items):
+        """ Remove the keys of cells, (text, row id) pairs, in one pass """
+        removed = set((text.lower(), row_id) for text, row_id in items)
+        self._keys = [key for key in self._keys if key not in removed]
+        self._added = [key for key in self._added if key not in removed]
+
+    def keys(self):
+        """ The sorted keys """
+        if self._added:
+            # sort() runs in about linear time on the sorted part
+            self._keys.extend(self._added)
+            self._keys.sort()
+            self._added = []
+        self._inserts = 0
+        return self._keys
+
+
+class CellFilter(object):
+    """ Column filter of Table.set_filter """
+
+    # filters with a lower cost are tested first
+    cost = 1
+
+    @ staticmethod
+    def make(value):
+        """
+        Filter for a set_filter value: a CellFilter, a callable
+        (FilterCallable), a (low, high) tuple (FilterRange) or a text or
+        number (FilterEqual).
+        """
+        if isinstance(value, CellFilter):
+            return value
+        if callable(value):
+            return FilterCallable(value)
+        if isinstance(value, tuple):
+            return FilterRange(*value)
+        return FilterEqual(value)
+
+    def match_rows(self, model, col, rows):
+        """ The rows (ascending row numbers) whose cell in col matches """
+        raise NotImplementedError
+
+    def narrows(self, other):
+        """ True if this filter matches only rows other matches too """
+        return self is other
+
+    def sql(self, name):
+        """
+        SQL condition on the column name and its parameters for
+        SqliteModel, None if the filter has none
+        """
+        return None
+
+
+class FilterEqual(CellFilter):
+    """
+    Cells equal to a value. A text is compared with the cell text,
+    a number with the value parsed by the column sort_key (by float
+    without sort_key).
+    """
+
+    cost = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def match_rows(self, model, col, rows):
+        if not isinstance(self.value, (int, float)):
+            texts = model.columns[col].texts
+            return [row_num for row_num in rows
+                    if texts[row_num] == self.value]
+        return model.rows_in_range(col, self.value, self.value, rows)
+
+    def narrows(self, other):
+        return isinstance(other, FilterEqual) and self.value == other.value
+
+    def sql(self, name):
+        return '%s = ?' % name, [self.value]
+
+
+class FilterRange(CellFilter):
+    """ Parsed cell values in low..high (inclusive), None for no limit """
+
+    cost = 0
+
+    def __init__(self, low=None, high=None):
+        self.low = low
+        self.high = high
+
+    def match_rows(self, model, col, rows):
+        return model.rows_in_range(col, self.low, self.high, rows)
+
+    def narrows(self, other):
+        return isinstance(other, FilterRange) and \
+            (other.low is None or
+             self.low is not None and self.low >= other.low) and \
+            (other.high is None or
+             self.high is not None and self.high <= other.high)
+
+    def sql(self, name):
+        clauses = []
+        params = []
+        if self.low is not None:
+            clauses.append('CAST(%s AS REAL) >= ?' % name)
+            params.append(self.low)
+        if self.high is not None:
+            clauses.append('CAST(%s AS REAL) <= ?' % name)
+            params.append(self.high)
+        return '(%s)' % (' AND '.join(clauses) or '1'), params
+
+
+class FilterContains(CellFilter):
+    """ Cell texts containing a text """
+
+    def __init__(self, text, ignore_case=False):
+        self.text = text.lower() if ignore_case else text
+        self.ignore_case = ignore_case
+
+    def match_rows(self, model, col, rows):
+        texts = model.columns[col].texts
+        if self.ignore_case:
+            return [row_num for row_num in rows
+                    if self.text in texts[row_num].lower()]
+        return [row_num for row_num in rows if self.text in texts[row_num]]
+
+    def narrows(self, other):
+        return isinstance(other, FilterContains) and \
+            self.ignore_case == other.ignore_case and \
+            other.text in self.text
+
+    def sql(self, name):
+        if self.ignore_case:
+            # lower() of SQLite changes only ASCII letters
+            return 'instr(lower(%s), ?) > 0' % name, [self.text]
+        return 'instr(%s, ?) > 0' % name, [self.text]
+
+
+class FilterCallable(CellFilter):
+    """ Cells for which a callable taking the cell text returns true """
+
+    cost = 2
+
+    def __init__(self, func):
+        self.func = func
+
+    def match_rows(self, model, col, rows):
+        texts = model.columns[col].texts
+        return [row_num for row_num in rows if self.func(texts[row_num])]
+
+    def narrows(self, other):
+        return isinstance(other, FilterCallable) and self.func is other.func
+
+
+class VirtualRows(object):
+    """ Two-level array of VirtualCell for a virtual table """
+
+    def __init__(self, grid):
+        self._grid = grid
+
+    def __len__(self):
+        return self._grid._model.row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('row index out of range')
+        return [VirtualCell(self._grid, index, col)
+                for col in range(len(self._grid._model.columns))]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class VirtualCell(object):
+    """
+    Cell of a virtual table, a view on the table model.
+    Writes also go to the widget while the row is in view.
+    """
+
+    defaults = {
+        'text': '',
+        'color_widget': [1, 1, 1, 1],
+        'color_click': [0.8, 0.8, 0.8, 1],
+        'data': None,
+    }
+
+    def __init__(self, grid, row, col):
+        self.__dict__['_grid'] = grid
+        self.__dict__['_row'] = row
+        self.__dict__['_col'] = col
+
+    @ property
+    def row(self):
+        """ row index of the cell """
+        return self._row
+
+    @ property
+    def col(self):
+        """ column index of the cell """
+        return self._col
+
+    def __getattr__(self, name):
+        column = self._grid._model.columns[self._col]
+        if name == 'text':
+            return column.texts[self._row]
+        if name == 'cell_type':
+            return column.cell_types[self._row]
+        if name == 'sort_key':
+            return column.sort_key
+        attrs = column.attrs[self._row]
+        if name in attrs:
+            return attrs[name]
+        widget = self._grid._widget_at(self._row, self._col)
+        if widget is not None:
+            return getattr(widget, name)
+        if name == 'background_color':
+            return self.color_widget
+        if name in self.defaults:
+            return self.defaults[name]
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name == 'text':
+            self._grid._model.set_text(self._row, self._col, value)
+        else:
+            self._grid._model.set_attr(self._row, self._col, name, value)
+        widget = self._grid._widget_at(self._row, self._col)
+        if widget is not None:
+            setattr(widget, name, value)
+        else:
+            self._grid._redraw_cell(self._row, self._col)
+
+    def _background_color(self, value):
+        """ Set the background color """
+        widget = self._grid._widget_at(self._row, self._col)
+        if widget is not None:
+            widget.background_color = value
+
+
+class DrawnCell(Button):
+    """
+    Read-only cell type. A virtual table doesn't create widgets for it,
+    the grid draws the text and the background of the rows in view
+    (CellDrawing) and finds clicked cells by their position. Other tables
+    show it as a Button.
+    Example: add_row([DrawnCell, {'text': 'text'}], [TextInput, {}])
+    """
+    pass
+
+
+class CellDrawing(object):
+    """
+    Canvas instructions of a drawn cell in view, reused for other rows
+    like the pooled widgets. The text is drawn as a label texture, clipped
+    to the cell width.
+    """
+
+    background_normal = 'atlas://data/images/defaulttheme/button'
+    # space between the text and the left/right cell border
+    text_padding = 5
+
+    def __init__(self, cell_type):
+        self.cell_type = cell_type
+        self._row = 0
+        self._col = 0
+        self._selected = False
+        self.size = (0, 0)
+        self.color_widget = VirtualCell.defaults['color_widget']
+        self.color_click = VirtualCell.defaults['color_click']
+        self.halign = 'center'
+        # Rendered text and the font it was rendered with
+        self._texture = None
+        self._text_key = None
+        self.group = InstructionGroup()
+        self._bg_color = Color(*self.color_widget)
+        self._bg_image = BorderImage(source=self.background_normal,
+                                     border=(16, 16, 16, 16))
+        self._text_color = Color(1, 1, 1, 1)
+        self._text_rect = Rectangle(size=(0, 0))
+        for instruction in (self._bg_color, self._bg_image,
+                            self._text_color, self._text_rect):
+            self.group.add(instruction)
+
+    @ property
+    def width(self):
+        """ cell width """
+        return self.size[0]
+
+    @ width.setter
+    def width(self, width):
+        self.size = (width, self.size[1])
+
+    def show(self, text, attrs, selected):
+        """ Show the text and the colors of a cell """
+        defaults = VirtualCell.defaults
+        self.color_widget = attrs.get('color_widget',
+                                      defaults['color_widget'])
+        self.color_click = attrs.get('color_click', defaults['color_click'])
+        self._selected = selected
+        self._background_color(
+            self.color_click if selected else self.color_widget)
+        self._text_color.rgba = attrs.get('color', [1, 1, 1, 1])
+        self.halign = attrs.get('halign', 'center')
+        font_name, font_size = _cell_font(attrs)
+        options = {'font_name': font_name, 'font_size': font_size}
+        key = TextureCache.key(text, options)
+        if key != self._text_key:
+            self._text_key = key
+            self._texture = None
+            if text:
+                self._texture = texture_cache.get(key)
+            if text and self._texture is None:
+                label = CoreLabel(text=text, **options)
+                label.refresh()
+                self._texture = label.texture
+                if self._texture is not None:
+                    texture_cache.put(key, self._texture, label)
+
+    def place(self, x, y, width, height):
+        """ Move the drawing to the cell at x, y """
+        self.size = (width, height)
+        self._bg_image.pos = (x, y)
+        self._bg_image.size = (width, height)
+        texture = self._texture
+        if texture is None:
+            self._text_rect.size = (0, 0)
+            return
+        text_width, text_height = texture.size
+        room = int(max(width - 2 * self.text_padding, 0))
+        if text_width > room:
+            texture = texture.get_region(0, 0, room, text_height)
+            text_width = room
+        if self.halign == 'left':
+            text_x = x + self.text_padding
+        elif self.halign == 'right':
+            text_x = x + width - self.text_padding - text_width
+        else:
+            text_x = x + (width - text_width) / 2.
+        self._text_rect.texture = texture
+        self._text_rect.pos = (text_x, y + (height - text_height) / 2.)
+        self._text_rect.size = (text_width, text_height)
+
+    def _background_color(self, value):
+        """ Set the background color """
+        self._bg_color.rgba = value
 
 
 class NewLabelSplitter(Splitter):
@@ -844,7 +4188,14 @@ class NewLabelSplitter(Splitter):
         super(NewLabelSplitter, self).__init__(**kwargs)
         self.padding = 0
         self.spacing = 0
-    pass
+
+    def on_touch_down(self, touch):
+        """ Double-click on the strip fits the column width """
+        if touch.is_double_tap and self._strip.collide_point(*touch.pos):
+            # Splitter -> LabelPanel -> ScrollViewLabel -> Table
+            self.parent.parent.parent.autofit(self.children[1].col)
+            return True
+        return super(NewLabelSplitter, self).on_touch_down(touch)
 
 
 class NewLabel(ButtonBehavior, BoxLayout):
@@ -890,8 +4241,9 @@ class NewLabel(ButtonBehavior, BoxLayout):
         # Disable a click
         self.state = 'normal'
         # print('pressed on name label')
-        # sort
-        self.parent.parent.parent.parent.sort_list(self._col, self._rev)
+        # sort, shift-click adds the column to the sort
+        self.parent.parent.parent.parent.sort_list(
+            self._col, self._rev, 'shift' in Window.modifiers)
         self._rev = not self._rev
 
     def _on_text(self, *args, **kwargs):
@@ -906,9 +4258,13 @@ class NullLabel(Button):
 
     def __init__(self, **kwargs):
         super(NullLabel, self).__init__(**kwargs)
-        self.bind(size=self._redraw_widget)
         self.bind(on_press=self._on_press_button)
         self._color = [.2, .2, .2, 1]
+        # Background, updated in place
+        with self.canvas.before:
+            self._bg_color = Color(*self._color)
+            self._bg_rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._redraw_widget, size=self._redraw_widget)
 
     @ property
     def color(self):
@@ -928,13 +4284,12 @@ class NullLabel(Button):
 
     def _redraw_widget(self, *args):
         """ Method of redraw this widget """
-        with self.canvas.before:
-            self.canvas.before.clear()
-            Color(*self._color)
-            Rectangle(pos=self.pos, size=self.size)
+        self._bg_color.rgba = self._color
+        self._bg_rect.pos = self.pos
+        self._bg_rect.size = self.size
 
 
-class NewNumberLabel(Button):
+class NewNumberLabel(SharedTextureLabel, Button):
     """Num Label object class"""
 
     def __init__(self, **kwargs):
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+# Tests of the Table widget, Kivy runs without a display: the mock GL
+# backend and the SDL offscreen video driver, as in benchmark.py
+
+import os
+import sys
+
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+os.environ.setdefault('KIVY_WINDOW', 'sdl2')
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import pytest
+
+
+def frames(count=3):
+    """ Run frames of the event loop """
+    from kivy.base import EventLoop
+    for _ in range(count):
+        EventLoop.idle()
+
+
+@pytest.fixture
+def table():
+    """ An empty table in the window """
+    from kivy.base import EventLoop
+    from kivy.core.window import Window
+    from table import Table
+    EventLoop.ensure_window()
+    Window.size = (800, 600)
+    table = Table()
+    Window.add_widget(table)
+    frames()
+    yield table
+    Window.remove_widget(table)
+    frames()
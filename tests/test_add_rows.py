@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+from conftest import frames
+
+
+def layout_counts(table, rows):
+    """ Counts of the operations of add_button_rows, before and after
+    the next frames """
+    table.enable_stats()
+    table.add_button_rows(rows)
+    before = table.stats.snapshot()
+    frames()
+    return before, table.stats.snapshot()
+
+
+def test_add_rows_lays_out_once(table):
+    """ The grid is laid out for all the rows of add_rows, not per row """
+    table.cols = 2
+    table.add_button_rows(('a', str(num)) for num in range(30))
+    frames()
+    before, one = layout_counts(table, [('b', 'c')])
+    assert 'grid_layout' not in before
+    before, many = layout_counts(table, (('d', str(num))
+                                         for num in range(100)))
+    assert 'grid_layout' not in before
+    assert many['grid_layout']['count'] == one['grid_layout']['count']
+    assert many['col_width']['count'] == 1
+    cells = table.grid.children[::-1]
+    assert len(cells) == 2 * 131
+    assert [cell.text for cell in cells[60:64]] == ['b', 'c', 'd', '0']
+    assert [cell.y for cell in cells[::2]] == sorted(
+        (cell.y for cell in cells[::2]), reverse=True)
+    labels = table.number_panel.children[::-1]
+    assert [label.text for label in labels] == [str(num)
+                                                for num in range(1, 132)]
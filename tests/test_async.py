@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+from conftest import frames
+
+
+def run(coroutine):
+    """ Run a coroutine, with a Kivy frame between the asyncio steps """
+    async def pump():
+        task = asyncio.ensure_future(coroutine)
+        while not task.done():
+            frames(1)
+            await asyncio.sleep(0)
+        return task
+    return asyncio.run(pump())
+
+
+class FakeProducer(object):
+    """ Async rows, some at each step of the loop """
+
+    def __init__(self, count, per_step=5):
+        self.count = count
+        self.per_step = per_step
+        self.produced = 0
+        self.closed = False
+
+    async def rows(self):
+        from kivy.uix.button import Button
+        try:
+            for num in range(self.count):
+                if num % self.per_step == 0:
+                    await asyncio.sleep(0)
+                self.produced += 1
+                yield [[Button, {'text': str(num)}]]
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def async_table(table):
+    table.virtual = True
+    table.cols = 1
+    return table
+
+
+def test_rows_added_in_batches(async_table):
+    producer = FakeProducer(500)
+    batches = []
+    add_rows = async_table.add_rows
+
+    def record(rows):
+        rows = list(rows)
+        batches.append(len(rows))
+        # the producer is at most a batch ahead of the table
+        assert producer.produced - async_table.model.row_count <= 50
+        add_rows(rows)
+    async_table.add_rows = record
+    task = run(async_table.append_rows_async(producer.rows(), 50))
+    assert task.result() == 500
+    assert async_table.model.row_count == 500
+    assert async_table.model.columns[0].texts[-1] == '499'
+    assert max(batches) <= 50 and len(batches) < 500
+    assert producer.closed
+
+
+def test_cancel_drops_the_rest(async_table):
+    producer = FakeProducer(10 ** 6)
+
+    async def cancel_later():
+        task = asyncio.ensure_future(
+            async_table.append_rows_async(producer.rows(), 50))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    run(cancel_later())
+    frames()
+    assert producer.closed
+    assert 0 < async_table.model.row_count < 10 ** 6
+    assert async_table.model.row_count <= producer.produced
+
+
+def test_add_rows_error_is_raised(async_table):
+    producer = FakeProducer(100)
+
+    def fail(rows):
+        raise RuntimeError('no rows')
+    async_table.add_rows = fail
+    task = run(async_table.append_rows_async(producer.rows(), 10))
+    with pytest.raises(RuntimeError):
+        task.result()
+    assert producer.closed
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from table import NewNumberLabel, NumberPanel
+
+PROPERTIES = ('size', 'size_hint', 'size_hint_min', 'size_hint_max',
+              'pos_hint', 'motion_filter')
+
+
+def observers(widget):
+    return dict((name, len(widget.get_property_observers(name)))
+                for name in PROPERTIES)
+
+
+@pytest.fixture
+def panel():
+    panel = NumberPanel()
+    panel.add_widget(NewNumberLabel(text='0'))
+    return panel
+
+
+def test_batch_matches_add_remove_widget(panel):
+    """ The batch methods bind like add_widget and remove_widget """
+    labels = [NewNumberLabel(text=str(num)) for num in range(3)]
+    free = observers(labels[0])
+    panel.add_widget(labels[0])
+    added = observers(labels[0])
+    assert added['pos_hint'] == free['pos_hint'] + 1
+    panel._add_widgets(labels[1:])
+    assert [observers(label) for label in labels[1:]] == [added, added]
+    assert panel.children[:3] == labels[::-1]
+    panel._remove_widgets(labels)
+    assert [observers(label) for label in labels] == [free] * 3
+    assert all(label.parent is None for label in labels)
+    assert len(panel.children) == 1
+    canvases = set(map(id, panel.canvas.children))
+    assert id(panel.children[0].canvas) in canvases
+    assert not canvases & set(id(label.canvas) for label in labels)
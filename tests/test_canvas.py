@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from kivy.uix.button import Button
+
+from conftest import frames
+from table import DrawnCell
+
+
+def panels(table):
+    """ ScrollViewTable, LabelPanel, NumberPanel, NullLabel, GridTable """
+    return [table.scroll_view, table.label_panel, table.number_panel,
+            table.label_panel.children[-1], table.grid]
+
+
+def test_resize_keeps_instruction_count(table):
+    """ Resizes and color changes update the backgrounds in place """
+    table.cols = 2
+    table.add_button_rows((str(num), str(num)) for num in range(20))
+    frames()
+    counts = [len(panel.canvas.before.children) for panel in panels(table)]
+    for step in range(3000):
+        for panel in panels(table):
+            panel.size = (300 + step % 200, 200 + step % 100)
+            panel.pos = (step % 7, step % 5)
+            panel.color = [step % 3 / 2., .5, .5, 1]
+        if step % 100 == 0:
+            frames(1)
+    frames()
+    assert [len(panel.canvas.before.children)
+            for panel in panels(table)] == counts
+
+
+class Touch(object):
+    """ The parts of a MotionEvent the grid reads """
+    is_mouse_scrolling = False
+
+    def __init__(self, x, y):
+        self.pos = (x, y)
+        self.x, self.y = x, y
+
+
+def test_drawn_cell_hit_testing(table):
+    """ Clicks on drawn cells find their row and column by position """
+    table.virtual = True
+    table.cols = 2
+    table.add_rows([[DrawnCell, {'text': 'r%d' % num}],
+                    [Button, {'text': str(num % 2)}]] for num in range(300))
+    table.set_filter({1: '0'})
+    frames()
+    grid = table.grid
+    table.scroll_view.scroll_to_row(table.model.shown_rows[100])
+    frames()
+    height = table.row_height
+    left = grid._col_lefts
+    for position in (100, 101, 105):
+        y = grid.top - (position + .5) * height
+        assert grid.on_touch_down(Touch(grid.x + left[1] - 1, y))
+        assert grid.current_cell.row == 2 * position
+        assert grid.current_cell.col == 0
+        assert table._chosen_row == 2 * position
+        assert grid.current_cell.text == 'r%d' % (2 * position)
+        # the button column has widgets, not drawings
+        assert grid._drawing_at(grid.x + left[1] + 1, y) is None
+    # out of the rows in view
+    assert grid._drawing_at(grid.x + 1, grid.top - .5 * height) is None
+    assert grid._drawing_at(grid.x + left[-1] + 1, y) is None
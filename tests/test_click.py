@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from conftest import frames
+
+
+def test_pressed_cell_chooses_its_row(table):
+    """ A pressed cell knows its row after sorts, deletions and filters """
+    table.cols = 2
+    table.add_button_rows((str(num), str(num % 3)) for num in range(30))
+    frames()
+    table.sort_list(0, True)
+    table.del_rows([0, 5, 6])
+    table.set_filter({1: '1'})
+    frames()
+    grid = table.grid
+    for row_num in table.model.shown_rows:
+        for cell in grid.cells[row_num]:
+            cell.dispatch('on_press')
+            assert table._chosen_row == row_num
+            assert grid.current_cell is cell
+            assert table.model.columns[0].texts[row_num] == \
+                grid.cells[row_num][0].text
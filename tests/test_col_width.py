@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from kivy.core.text import DEFAULT_FONT
+from kivy.metrics import sp
+from kivy.uix.button import Button
+
+from conftest import frames
+
+
+def test_drag_places_rows_in_view(table):
+    """ While a column is resized only the rows in view are placed """
+    table.cols = 3
+    table.add_button_rows(('a%d' % num, 'b%d' % num, 'c%d' % num)
+                          for num in range(500))
+    frames()
+    grid = table.grid
+    splitter = table.label_panel.labels[1].parent
+    last_cell = grid.cells[-1][1]
+    x = last_cell.x
+    for _ in range(5):
+        splitter.width += 10
+        frames(1)
+    first = grid.cells[0]
+    assert first[1].x == first[0].x + first[0].width
+    assert first[0].width == splitter.width
+    assert grid.width == sum(cell.width for cell in first)
+    # out of view
+    assert last_cell.x == x
+    grid._trigger_all_widths.cancel()
+    grid._apply_all_widths()
+    frames()
+    assert last_cell.x == first[1].x
+    assert grid.cells[-1][0].width == splitter.width
+
+
+@pytest.mark.parametrize('virtual', [False, True])
+def test_fit_width_measures_each_font(table, virtual):
+    """ The fit width measures each cell in its own font """
+    table.virtual = virtual
+    table.cols = 1
+    rows = [[[Button, {'text': 'narrow'}]] for _ in range(10)]
+    rows[5] = [[Button, {'text': 'narrow', 'font_size': sp(40)}]]
+    table.add_rows(rows)
+    frames()
+    small = table.get_auto_width('narrow')
+    big = table.get_auto_width('narrow', DEFAULT_FONT, sp(40))
+    padding = table.auto_width_padding
+    assert table.get_fit_width(0) == max(small, big) + padding
+    table.del_row(5)
+    assert table.get_fit_width(0) == small + padding
+    if virtual:
+        table.grid.cells[2][0].font_size = sp(30)
+        assert table.get_fit_width(0) == table.get_auto_width(
+            'narrow', DEFAULT_FONT, sp(30)) + padding
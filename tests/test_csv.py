@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import time
+
+import pytest
+
+from conftest import frames
+
+ROWS = [['name', 'price', 'note'],
+        ['tea', '2.5', 'green, loose'],
+        ['coffee', '10', 'said "strong"'],
+        ['кефир', 'n/a', 'two\nlines'],
+        ['water', '0.5', '']]
+
+
+def load(table, path, **kwargs):
+    """ load_csv and run the frames until it's done """
+    done = []
+    table.load_csv(str(path), on_done=done.append, **kwargs)
+    end_time = time.time() + 10
+    while not done and time.time() < end_time:
+        frames(1)
+    assert done
+    return done[0]
+
+
+@pytest.mark.parametrize('virtual', [False, True])
+@pytest.mark.parametrize('suffix', ['.csv', '.tsv'])
+def test_csv_round_trip(table, tmp_path, virtual, suffix):
+    """ Quoting, unicode and newlines survive a load and a save """
+    table.virtual = virtual
+    delimiter = '\t' if suffix == '.tsv' else ','
+    source = tmp_path / ('source' + suffix)
+    with open(str(source), 'w', newline='', encoding='utf-8') as csv_file:
+        csv.writer(csv_file, delimiter=delimiter).writerows(ROWS)
+    assert load(table, source, sort_keys=[None, float], chunk_size=2) == 4
+    assert table.cols == 3
+    assert [label.text for label in table.label_panel.labels[1:]] == \
+        ROWS[0]
+    assert table.model.columns[1].sort_key is float
+    target = tmp_path / ('target' + suffix)
+    table.save_csv(str(target))
+    with open(str(target), newline='', encoding='utf-8') as csv_file:
+        assert list(csv.reader(csv_file, delimiter=delimiter)) == ROWS
+    # the shown rows in the sorted order, unparsed prices last
+    table.sort_list(1, False)
+    table.save_csv(str(target), header=False)
+    with open(str(target), newline='', encoding='utf-8') as csv_file:
+        assert [row[0] for row in csv.reader(
+            csv_file, delimiter=delimiter)] == \
+            ['water', 'tea', 'coffee', 'кефир']
+    table.set_filter({1: (1, None)})
+    table.save_csv(str(target), header=False)
+    with open(str(target), newline='', encoding='utf-8') as csv_file:
+        assert list(csv.reader(csv_file, delimiter=delimiter)) == \
+            [ROWS[1], ROWS[2]]
+
+
+def test_csv_short_and_long_lines(table, tmp_path):
+    """ Lines are cut or padded to the columns of the first one """
+    source = tmp_path / 'ragged.csv'
+    source.write_text('a,b\n1\n2,3,4\n', encoding='utf-8')
+    assert load(table, source, header=False) == 3
+    assert table.model.row_texts(1) == ['1', '']
+    assert table.model.row_texts(2) == ['2', '3']
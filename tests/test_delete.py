@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from conftest import frames
+
+
+@pytest.mark.parametrize('virtual', [False, True])
+def test_del_row_above_chosen(table, virtual):
+    """ The chosen row moves up with its data, filtering still works """
+    table.virtual = virtual
+    table.cols = 1
+    table.add_button_rows((str(num),) for num in range(10))
+    frames()
+    table.choose_row(9)
+    table.del_row(2)
+    assert table.row_count == 9
+    assert table._chosen_row == 8
+    assert table.model.columns[0].texts[table._chosen_row] == '9'
+    table.set_filter({0: '5'})
+    frames()
+    assert list(table.model.shown_rows) == [4]
+    assert table._chosen_row == 4
+    table.del_row(4)
+    assert table.model.row_count == 8
+    table.set_filter()
+    frames()
+    assert 0 <= table._chosen_row < table.model.row_count
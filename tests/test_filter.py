@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+from conftest import frames
+from table import FilterEqual, TableModel
+
+
+def test_range_on_text_column(table):
+    """ Number bounds on a column without sort_key parse the texts """
+    table.cols = 2
+    table.add_button_rows((str(num), str(num * 3)) for num in range(10))
+    table.add_button_rows([('x', 'n/a')])
+    table.set_filter({1: (10, 20)})
+    assert list(table.model.shown_rows) == [4, 5, 6]
+    table.set_filter({1: FilterEqual(9)})
+    assert list(table.model.shown_rows) == [3]
+    table.set_filter({1: '9'})
+    assert list(table.model.shown_rows) == [3]
+    frames()
+
+
+def test_range_few_rows_and_numpy_agree(table):
+    """ The looped path for a few rows matches the NumPy one """
+    from kivy.uix.button import Button
+    table.cols = 1
+    table.add_rows([[Button, {'text': text, 'sort_key': float}]]
+                   for text in ['1.5', 'bad', '30', '-2', '7'] * 30)
+    model = table.model
+    everything = model.rows_in_range(0, 0, 10)
+    looped = [row_num for row_num in range(model.row_count)
+              if model.rows_in_range(0, 0, 10, [row_num])]
+    assert everything == looped
+    assert len(everything) == 60
+    assert TableModel.numpy_min_rows > 1
+
+
+def test_show_rows_batch(table):
+    """ Widget mode filters hide and show the cell widgets """
+    table.cols = 2
+    table.add_button_rows((str(num), 'odd' if num % 2 else 'even')
+                          for num in range(200))
+    frames()
+    grid = table.grid
+    table.set_filter({1: 'odd'})
+    frames()
+    assert len(grid.children) == 200
+    assert [cell.text for cell in grid.children[::-1][:4]] == \
+        ['1', 'odd', '3', 'odd']
+    assert all(cell.parent is None for cell in grid.cells[0])
+    table.set_filter()
+    frames()
+    assert len(grid.children) == 400
+    assert [cell.text for cell in grid.children[::-1][:2]] == ['0', 'even']
+    assert all(id(cell.canvas) in set(map(id, grid.canvas.children))
+               for cell in grid.children)
+
+
+def test_filter_before_rows(table):
+    """ A filter set on an empty table applies to the added rows """
+    table.cols = 1
+    table.set_filter({0: 'b'})
+    table.add_button_rows([('a',), ('b',), ('c',)])
+    assert list(table.model.shown_rows) == [1]
+
+
+def test_filter_with_chosen_row_out_of_range(table):
+    """ A chosen row past the last row is moved to a shown row """
+    table.cols = 1
+    table.add_button_rows((str(num),) for num in range(5))
+    table.chosen_row = 7
+    table.set_filter({0: '3'})
+    assert table.chosen_row == 3
+    table.set_filter()
+    table.chosen_row = 9
+    assert table.apply_updates([(1, 0, 'x')]) == 1
+    table.set_filter({0: 'x'})
+    table.chosen_row = 9
+    table.apply_updates([(1, 0, 'y'), (2, 0, 'x')])
+    assert table.chosen_row == 2
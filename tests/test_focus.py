@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+from kivy.uix.behaviors import FocusBehavior
+from kivy.uix.textinput import TextInput
+
+from conftest import frames
+
+
+def keyboard_owners():
+    return [widget for widget in FocusBehavior._keyboards.values()
+            if widget is not None]
+
+
+def test_choose_row_releases_cell_keyboard(table):
+    """ Choosing a row takes the keyboard from a focused cell editor """
+    table.cols = 2
+    table.add_rows([[TextInput, {'text': str(num)}], [TextInput, {}]]
+                   for num in range(5))
+    frames()
+    editor = table.grid.cells[1][1]
+    editor.focus = True
+    frames()
+    assert editor.focus
+    assert editor in keyboard_owners()
+    table.choose_row(3)
+    frames()
+    assert not editor.focus
+    assert editor not in keyboard_owners()
+    assert table._chosen_row == 3
+
+
+def test_focus_out_keeps_the_table(table):
+    """ focus_out releases the keyboards of the other widgets only """
+    table.cols = 1
+    table.add_rows([[TextInput, {}]] for _ in range(3))
+    frames()
+    table.focus = True
+    table.focus_out()
+    assert table.focus
+    editor = table.grid.cells[2][0]
+    editor.focus = True
+    table.focus_out()
+    assert not editor.focus
+    assert keyboard_owners() == []
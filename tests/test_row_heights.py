@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from conftest import frames
+
+
+def test_number_labels_follow_row_heights(table):
+    """ Resized cells update their row height and number label once in
+    the next frame, the tallest cell of a row sets its height """
+    table.cols = 2
+    table.add_button_rows((str(num), str(num)) for num in range(20))
+    frames()
+    table.set_filter({0: (5, None)})
+    frames()
+    grid = table.grid
+    labels = table.number_panel.children[::-1]
+    table.enable_stats()
+    grid.cells[7][0].height = 50
+    grid.cells[7][1].height = 70
+    grid.cells[9][1].height = 45
+    assert grid._row_heights[7] == 30
+    frames()
+    assert table.stats.snapshot()['row_heights']['count'] == 1
+    assert grid._row_heights[7] == 70
+    assert grid._row_heights[9] == 45
+    # rows 7 and 9 are shown at positions 2 and 4
+    assert [label.height for label in labels[:5]] == [30, 30, 70, 30, 45]
+    grid.cells[7][1].height = 30
+    frames()
+    assert grid._row_heights[7] == 50
+    assert labels[2].height == 50
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from itertools import count
+
+import pytest
+
+from conftest import frames
+
+
+def endless_rows():
+    from kivy.uix.button import Button
+    return ([[Button, {'text': str(num)}]] for num in count())
+
+
+@pytest.mark.parametrize('virtual', [False, True])
+def test_pages_fill_the_view(table, virtual):
+    table.virtual = virtual
+    table.cols = 1
+    table.set_row_source(endless_rows(), page_size=5)
+    frames(10)
+    loaded = table.model.row_count
+    assert loaded > 5
+    assert table.has_more_rows and table.total_rows is None
+    frames(10)
+    assert table.model.row_count == loaded
+
+
+@pytest.mark.parametrize('virtual', [False, True])
+def test_filter_hiding_new_rows_is_bounded(table, virtual):
+    """ An endless source whose rows are all hidden doesn't hang """
+    table.virtual = virtual
+    table.cols = 1
+    table.set_filter({0: 'no such text'})
+    table.set_row_source(endless_rows(), page_size=20)
+    frames(10)
+    pages = 1 + table.max_fetch_pages
+    assert table.model.row_count <= 20 * pages
+    table.scroll_view.down()
+    assert table.model.row_count <= 20 * (pages + table.max_fetch_pages)
+    frames(10)
+    assert len(table.model.shown_rows) == 0
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+
+from table import PrefixIndex, SqliteModel
+
+
+def fill(table, texts):
+    table.virtual = True
+    table.cols = 1
+    table.add_button_rows((text,) for text in texts)
+
+
+def test_find_next_follows_the_sort(table):
+    """ F3 moves down the screen, also on a descending column """
+    fill(table, ['apple', 'banana', 'avocado', 'cherry', 'apricot'])
+    for rev in (False, True):
+        table.sort_list(0, rev)
+        texts = table.model.columns[0].texts
+        first = table.find('a')
+        rows = [first] + [table.find('a', next=True) for _ in range(3)]
+        assert rows[:3] == sorted(rows[:3])
+        assert rows[3] == first
+        assert [texts[row_num] for row_num in rows[:3]] == \
+            sorted(['apple', 'avocado', 'apricot'], reverse=rev)
+
+
+def test_index_follows_changes(table):
+    fill(table, ['k%03d' % num for num in range(300)])
+    assert table.find('k15') == 150
+    table.apply_updates([(150, 0, 'x150')])
+    table.add_button_rows([('k150',)])
+    assert table.find('k150') == 300
+    assert table.find('x1') == 150
+    table.del_rows(slice(0, 100))
+    assert table.find('k0') is None
+    assert table.find('k1') == 0
+    assert table.find('x') == 50
+
+
+def test_prefix_index_bulk_add():
+    """ Past max_inserts the added keys are sorted in on the search """
+    index = PrefixIndex(['b', 'a'], [0, 1])
+    for row_id in range(2, 3000):
+        index.add('t%d' % row_id, row_id)
+    index.remove('t2999', 2999)
+    index.remove('b', 0)
+    keys = index.keys()
+    assert keys == sorted(keys)
+    assert len(keys) == 2999 - 2 + 1
+    assert ('t2999', 2999) not in keys
+
+
+def test_sqlite_find_descending(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'find.db'))
+    conn.execute('CREATE TABLE t (name TEXT)')
+    conn.executemany('INSERT INTO t VALUES (?)',
+                     [('ab',), ('b',), ('ac',), ('aa',)])
+    model = SqliteModel(conn, 't')
+    model.permute(model.sort_order([(0, True)]))
+    texts = model.columns[0].texts
+    row_num = model.find_prefix(0, 'a', rev=True)
+    assert texts[row_num] == 'ac'
+    row_num = model.find_prefix(0, 'a', row_num, rev=True)
+    assert texts[row_num] == 'ab'
+    row_num = model.find_prefix(0, 'a', row_num, rev=True)
+    assert texts[row_num] == 'aa'
+    assert texts[model.find_prefix(0, 'a', row_num, rev=True)] == 'ac'
+
+
+def press(table, text, keycode=None, modifiers=()):
+    table._on_keyboard_down(None, (keycode or ord(text), text), text,
+                            list(modifiers))
+
+
+def test_type_ahead_keys(table):
+    """ Typed characters search the column, F3 and the same key again
+    go to the next match, ctrl shortcuts don't search """
+    fill(table, ['cab', 'bay', 'card', 'bat', 'ace', 'cat'])
+    table.focus = True
+    press(table, 'b')
+    assert table._chosen_row == 3
+    press(table, '', keycode=284)   # F3
+    assert table._chosen_row == 1
+    press(table, 'a')
+    assert table._chosen_row == 1
+    press(table, 't')
+    assert table._chosen_row == 3
+    table._search_time -= table.search_timeout + 1
+    press(table, 'c')
+    assert table._chosen_row == 0
+    press(table, 'c')
+    assert table._chosen_row == 2
+    press(table, 'c')
+    assert table._chosen_row == 5
+    press(table, 'a', modifiers=['ctrl'])
+    assert table._chosen_row == 5
+    table.focus = False
+    press(table, 'a')
+    assert table._chosen_row == 5
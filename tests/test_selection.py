@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from conftest import frames
+
+
+def rows_in_view(table):
+    """ Row numbers whose first cell is in the scroll view on screen """
+    view = table.scroll_view
+    cells = table.grid.cells
+    return [row_num for row_num in table.model.shown_rows
+            if view.collide_point(*cells[row_num][0].to_window(
+                *cells[row_num][0].center))]
+
+
+def check_colors(table):
+    rows = rows_in_view(table)
+    assert rows
+    selection = table.model.selection
+    for row_num in rows:
+        for cell in table.grid.cells[row_num]:
+            color = cell.color_click if row_num in selection else \
+                cell.color_widget
+            assert list(cell.background_color) == list(color), row_num
+
+
+def selected_table(table):
+    table.cols = 2
+    table.add_button_rows((str(num), str(num)) for num in range(300))
+    frames()
+    table.choose_row(150)
+    table.scroll_view.scroll_to_row(160)
+    frames()
+    table.extend_selection(175)
+    frames()
+    return table
+
+
+def test_colors_after_del_rows(table):
+    selected_table(table).del_rows(list(range(20)) + [175])
+    frames(10)
+    assert table._chosen_row == 155
+    assert 155 in table.model.selection
+    check_colors(table)
+
+
+def test_colors_after_filter(table):
+    selected_table(table)
+    table.set_filter({0: lambda text: int(text) % 3 == 0})
+    frames(10)
+    check_colors(table)
+    table.set_filter()
+    frames(10)
+    check_colors(table)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+import table as table_module
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def sorted_table(request, table, monkeypatch):
+    """ A table of letters, numbers (some not parsed) and row numbers """
+    from kivy.uix.button import Button
+    if request.param == 'python':
+        monkeypatch.setattr(table_module, 'numpy', None)
+    elif table_module.numpy is None:
+        pytest.skip('NumPy is not installed')
+    random.seed(1)
+    table.virtual = True
+    table.cols = 3
+    table.add_rows([[Button, {'text': random.choice('abc')}],
+                    [Button, {'text': random.choice(['1', '2', '3', '?']),
+                              'sort_key': float}],
+                    [Button, {'text': str(num)}]] for num in range(300))
+    return table
+
+
+def rows(table):
+    columns = table.model.columns
+    return [tuple(column.texts[row_num] for column in columns)
+            for row_num in range(table.row_count)]
+
+
+def number_key(row):
+    # not parsed texts after the numbers
+    try:
+        return (0, float(row[1]))
+    except ValueError:
+        return (1, row[1])
+
+
+@pytest.mark.parametrize('rev', [False, True])
+def test_sort_again_keeps_other_sort(sorted_table, rev):
+    """ Sorting A, B, A orders the equal A values by B """
+    expected = rows(sorted_table)
+    for col, key in ((1, number_key), (0, lambda row: row[0]),
+                     (1, number_key)):
+        sorted_table.sort_list(col, rev)
+        expected.sort(key=key, reverse=rev)
+        assert rows(sorted_table) == expected
+
+
+def test_descending_is_stable(sorted_table):
+    """ Equal values keep their row order when sorted descending """
+    expected = rows(sorted_table)
+    sorted_table.sort_list(1, True)
+    expected.sort(key=number_key, reverse=True)
+    assert rows(sorted_table) == expected
+    sorted_table.sort_list(1, False)
+    expected.sort(key=number_key)
+    assert rows(sorted_table) == expected
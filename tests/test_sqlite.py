@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import time
+
+import pytest
+
+from conftest import frames
+from table import FilterRange, SqliteModel
+
+# rows of the on-disk database
+ROW_COUNT = 3000000
+
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    """ items(name, price, tag) with ROW_COUNT rows, in a file """
+    path = str(tmp_path_factory.mktemp('sqlite') / 'items.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE items (name TEXT, price REAL, tag TEXT)')
+    conn.execute(
+        'WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n '
+        'WHERE x < ?) INSERT INTO items SELECT printf(\'item %07d\', x), '
+        '(x * 7919) % 10007 / 10.0, substr(\'abcde\', x % 5 + 1, 1) '
+        'FROM n', (ROW_COUNT,))
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def sqlite_table(table, database):
+    """ A virtual table showing the database """
+    from kivy.core.window import Window
+    conn = sqlite3.connect(database)
+    table.virtual = True
+    table.set_model(SqliteModel(conn, 'items', sort_keys=[None, float]))
+    yield table
+    # the last reads before the connection is closed
+    Window.remove_widget(table)
+    frames()
+    conn.rollback()
+    conn.close()
+
+
+def test_first_paint(table, database):
+    """ The first rows are shown without reading the whole table """
+    conn = sqlite3.connect(database)
+    start = time.perf_counter()
+    table.virtual = True
+    table.set_model(SqliteModel(conn, 'items', sort_keys=[None, float]))
+    frames(1)
+    seconds = time.perf_counter() - start
+    model = table.model
+    assert table.row_count == ROW_COUNT
+    assert model.row_texts(0) == ['item 0000001', '791.9', 'b']
+    assert len(model._window) <= model.window_size
+    # about 0.4 s here, mostly the count(*) of the rows
+    assert seconds < 1
+    conn.close()
+
+
+def test_sort(sqlite_table):
+    model = sqlite_table.model
+    sqlite_table.sort_list(1, True)
+    assert model.row_texts(0)[1] == '1000.6'
+    # rowid keeps equal prices in their order
+    first = [model.row_id(row_num) for row_num in range(5)]
+    assert first == sorted(first)
+    last = model.row_texts(ROW_COUNT - 1)
+    assert last[1] == '0.0'
+    assert len(model._window) <= model.window_size
+
+
+def test_filter(sqlite_table, database):
+    model = sqlite_table.model
+    sqlite_table.set_filter({1: FilterRange(10, 20), 2: 'a'})
+    conn = sqlite3.connect(database)
+    count, = conn.execute('SELECT count(*) FROM items WHERE price >= 10 '
+                          'AND price <= 20 AND tag = \'a\'').fetchone()
+    conn.close()
+    assert sqlite_table.row_count == count
+    texts = model.row_texts(count - 1)
+    assert 10 <= float(texts[1]) <= 20 and texts[2] == 'a'
+
+
+def test_find_row_uses_index(sqlite_table):
+    """ Row ids are found by the index of the sorted view """
+    model = sqlite_table.model
+    sqlite_table.sort_list(1, False)
+    plan = ' '.join(row[-1] for row in model._conn.execute(
+        'EXPLAIN QUERY PLAN SELECT rowid - 1 FROM temp.%s '
+        'WHERE row_id = ?' % model._view, (1,)))
+    assert 'INDEX' in plan
+    row_num = ROW_COUNT // 2
+    row_id = model.row_id(row_num)
+    start = time.perf_counter()
+    for _ in range(1000):
+        assert model.find_row(row_id) == row_num
+    assert time.perf_counter() - start < .5
+
+
+def test_edit(sqlite_table):
+    """ set_text, append_row and delete_rows on the file """
+    from kivy.uix.button import Button
+    model = sqlite_table.model
+    sqlite_table.sort_list(0, True)
+    model.set_text(0, 2, 'z')
+    texts = model.row_texts(0)
+    assert texts[0] == 'item %07d' % ROW_COUNT and texts[2] == 'z'
+    model.append_row([[Button, {'text': 'new'}], [Button, {'text': '1.5'}],
+                      [Button, {'text': 'n'}]])
+    assert model.row_count == ROW_COUNT + 1
+    assert model.row_texts(ROW_COUNT) == ['new', '1.5', 'n']
+    new_id = model.row_id(ROW_COUNT)
+    assert model.find_row(new_id) == ROW_COUNT
+    model.delete_rows([0, ROW_COUNT])
+    assert model.row_count == ROW_COUNT - 1
+    assert model.row_texts(0)[0] == 'item %07d' % (ROW_COUNT - 1)
+    assert model.find_row(new_id) is None
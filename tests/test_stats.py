@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from conftest import frames
+from table import TableStats
+
+
+def test_record_and_snapshot():
+    """ Counts, totals and histogram buckets of the recorded times """
+    calls = []
+    stats = TableStats(lambda name, seconds: calls.append(name))
+    for seconds in (.00005, .003, .003, 2.):
+        stats.record('sort', seconds)
+    stats.record('up', .0001)
+    snapshot = stats.snapshot()
+    sort = snapshot['sort']
+    assert sort['count'] == 4
+    assert sort['total'] == pytest.approx(2.00605)
+    assert sort['mean'] == pytest.approx(2.00605 / 4)
+    assert sort['max'] == 2.
+    histogram = dict(sort['histogram'])
+    assert histogram[.0001] == 1
+    assert histogram[.005] == 2
+    assert histogram[float('inf')] == 1
+    assert sum(histogram.values()) == 4
+    # bounds are inclusive
+    assert dict(snapshot['up']['histogram'])[.0001] == 1
+    assert calls == ['sort'] * 4 + ['up']
+    stats.reset()
+    assert stats.snapshot() == {}
+
+
+def test_table_operations(table):
+    """ The table, its grid and its scroll view record to one stats,
+    only between enable_stats and disable_stats """
+    names = []
+    table.enable_stats(lambda name, seconds: names.append(name))
+    table.cols = 2
+    table.add_button_rows((str(num), str(-num)) for num in range(50))
+    frames()
+    table.choose_row(3)
+    table.scroll_view.down()
+    table.sort_list(0, False)
+    table.del_row(0)
+    frames()
+    counts = dict((name, op['count'])
+                  for name, op in table.stats.snapshot().items())
+    for name in ('add_rows', 'choose_row', 'down', 'sort', 'del_row',
+                 'del_rows', 'grid_layout', 'col_width'):
+        assert counts.get(name), name
+    assert counts['add_rows'] == 1
+    assert set(names) == set(counts)
+    assert len(names) == sum(counts.values())
+    stats = table.stats
+    table.disable_stats()
+    assert table.stats is None
+    assert table.grid._stats is None
+    assert table.scroll_view._stats is None
+    table.choose_row(5)
+    table.scroll_view.up()
+    frames()
+    assert stats.snapshot()['choose_row']['count'] == counts['choose_row']
+    assert len(names) == sum(counts.values())
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+from conftest import frames
+from table import CellButton, TextureCache, texture_cache
+
+
+class Texture(object):
+    def __init__(self, width, height):
+        self.size = (width, height)
+
+
+def test_lru_eviction():
+    """ Over the budget the least recently used textures are dropped """
+    cache = TextureCache(budget=3 * 400)
+    keys = [TextureCache.key(str(num), {'font_size': 15})
+            for num in range(4)]
+    for key in keys[:3]:
+        cache.put(key, Texture(10, 10), None)
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[3], Texture(10, 10), None)
+    assert cache.get(keys[1]) is None
+    assert [cache.get(key) is not None for key in keys] == \
+        [True, False, True, True]
+    assert cache.evictions == 1
+    # a texture put again replaces the old one, it takes more room
+    cache.put(keys[3], Texture(10, 20), None)
+    assert cache.size == 1200
+    assert cache.get(keys[0]) is None
+    assert cache.evictions == 2
+    cache.budget = 800
+    assert len(cache) == 1 and cache.size == 800
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0,
+                             'textures': 0, 'bytes': 0, 'budget': 800}
+
+
+def test_key_follows_options():
+    """ Other fonts, colors or text sizes don't share a texture """
+    key = TextureCache.key('a', {'font_size': 15, 'color': [1, 1, 1, 1],
+                                 'text_size': (None, None)})
+    assert key == TextureCache.key('a', {'text_size': (None, None),
+                                         'color': [1, 1, 1, 1],
+                                         'font_size': 15})
+    for options in ({'font_size': 16, 'color': [1, 1, 1, 1],
+                     'text_size': (None, None)},
+                    {'font_size': 15, 'color': [1, 0, 0, 1],
+                     'text_size': (None, None)},
+                    {'font_size': 15, 'color': [1, 1, 1, 1],
+                     'text_size': (100, 30)}):
+        assert TextureCache.key('a', options) != key
+    assert TextureCache.key('b', {'font_size': 15, 'color': [1, 1, 1, 1],
+                                  'text_size': (None, None)}) != key
+
+
+def test_cells_change_textures(table):
+    """ Cells with the same text share a texture, a changed cell gets the
+    texture of its new text or font """
+    table.cols = 1
+    table.add_button_rows([('same',), ('same',), ('other',)])
+    frames()
+    cells = [row[0] for row in table.grid.cells]
+    assert cells[0].texture is cells[1].texture
+    assert cells[0].texture is not cells[2].texture
+    cells[1].text = 'other'
+    frames()
+    assert cells[1].texture is cells[2].texture
+    assert cells[0].texture is not cells[1].texture
+    cells[2].font_size = cells[2].font_size * 2
+    frames()
+    assert cells[2].texture is not cells[1].texture
+    assert cells[2].texture.height > cells[1].texture.height
+    hits = texture_cache.hits
+    cells[0].text = 'other'
+    frames()
+    assert cells[0].texture is cells[1].texture
+    assert texture_cache.hits > hits
+
+
+def test_resized_cells_render_again(table):
+    """ A texture is cached for the text_size, cells of a resized column
+    don't get the texture of the old width """
+    table.cols = 1
+    table.add_rows([[CellButton, {'text': 'same', 'halign': 'left'}]]
+                   for _ in range(2))
+    frames()
+    cells = [row[0] for row in table.grid.cells]
+    old = cells[0].texture
+    assert cells[1].texture is old
+    splitter = table.label_panel.labels[1].parent
+    splitter.width += 60
+    frames()
+    for cell in cells:
+        assert cell.texture is not old
+        assert cell.texture.width == cell.text_size[0]
+    assert cells[0].texture is cells[1].texture
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from conftest import frames
+from table import NullLabel
+
+
+def texts(table, col=0):
+    column = table.model.columns[col]
+    return [column.texts[row_num] for row_num in table.model.shown_rows]
+
+
+def mark_counts(table):
+    """ Instructions of the column labels, with the sort marks """
+    return [len(parent.children[1].canvas.after.children)
+            for parent in table.label_panel.children
+            if not isinstance(parent, NullLabel)]
+
+
+def number_rows(count):
+    from kivy.uix.button import Button
+    return ([[Button, {'text': str(num), 'sort_key': int}],
+             [Button, {'text': 'row %d' % num}]] for num in count)
+
+
+@pytest.mark.parametrize('virtual', [False, True])
+def test_incremental_resort(table, virtual):
+    """ Changed rows move to their sorted place, the others keep theirs """
+    random.seed(3)
+    table.virtual = virtual
+    table.cols = 2
+    values = random.sample(range(1000), 200)
+    table.add_rows(number_rows(values))
+    table.sort_list(0, True)
+    frames()
+    chosen = table.model.row_id(table.chosen_row)
+    changes = [(row_num, 0, str(random.randrange(1000)))
+               for row_num in random.sample(range(200), 20)]
+    count = table.apply_updates(changes)
+    frames()
+    assert count <= 20
+    numbers = [int(text) for text in texts(table)]
+    assert numbers == sorted(numbers, reverse=True)
+    assert table.model.row_id(table.chosen_row) == chosen
+    if not virtual:
+        # the widgets show the model texts
+        assert [row[0].text for row in table.grid.cells] == texts(table)
+
+
+def test_updates_by_id_follow_moved_rows(table):
+    table.virtual = True
+    table.cols = 2
+    table.add_rows(number_rows(range(10)))
+    row_id = table.model.row_id(3)
+    table.sort_list(0, True)
+    table.apply_updates([(row_id, 1, 'changed')], by_id=True)
+    assert table.model.columns[1].texts[table.model.find_row(row_id)] == \
+        'changed'
+
+
+@pytest.mark.parametrize('virtual', [False, True])
+def test_append_to_sorted_table_ends_the_sort(table, virtual):
+    """ Sort, append, apply_updates: the rows stay where they are """
+    table.virtual = virtual
+    table.cols = 2
+    table.add_rows(number_rows([5, 1, 9, 3]))
+    frames()
+    unsorted = mark_counts(table)
+    table.sort_list(0, False)
+    assert table.sort_keys == [(0, False)]
+    assert mark_counts(table) != unsorted
+    table.add_rows(number_rows([2, 8]))
+    table.add_row(*next(number_rows([0])))
+    assert table.sort_keys == []
+    assert mark_counts(table) == unsorted
+    table.apply_updates([(1, 0, '7')])
+    frames()
+    assert texts(table) == ['1', '7', '5', '9', '2', '8', '0']
+    table.sort_list(0, False)
+    assert texts(table) == ['0', '1', '2', '5', '7', '8', '9']
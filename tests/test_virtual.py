@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from kivy.uix.button import Button
+from kivy.uix.textinput import TextInput
+
+from conftest import frames
+from table import NewCell
+
+
+def test_scrolling_reuses_the_cells(table):
+    """ A virtual table only has widgets for the rows in view, they're
+    bound to other rows while scrolling """
+    table.virtual = True
+    table.cols = 2
+    table.add_rows([[Button, {'text': 'b%d' % num}],
+                    [TextInput, {'text': 't%d' % num}]]
+                   for num in range(5000))
+    frames()
+    grid = table.grid
+    cells = set(map(id, grid.children))
+    assert 0 < len(cells) < 100
+    for row_num in (1000, 4999, 2500, 0):
+        table.scroll_view.scroll_to_row(row_num)
+        frames()
+        # a row more or less in view, partly shown
+        cells.update(map(id, grid.children))
+        assert len(cells) <= len(grid.children) + 2 * table.cols
+        assert len(table.number_panel.children) * table.cols <= \
+            len(cells)
+        texts = dict((cell._row, cell.text) for cell in grid.children
+                     if cell._col == 0)
+        assert texts[row_num] == 'b%d' % row_num
+
+
+def test_cell_classes_are_cached():
+    """ The cell class of a widget type is composed once """
+    cell_class = NewCell.cell_class(Button)
+    assert NewCell.cell_class(Button) is cell_class
+    assert issubclass(cell_class, NewCell) and \
+        issubclass(cell_class, Button)
+    assert NewCell.cell_class(TextInput) is not cell_class